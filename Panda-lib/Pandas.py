@@ -45,8 +45,10 @@ WHEELS_LOCK = ROOT / "wheels.lock"
 # helpers
 # ──────────────────────────────────────────────────────────────────────────────
 def _sha256sum(path: Path) -> str:
-    h = hashlib.sha256()
     with path.open("rb") as f:
+        if hasattr(hashlib, "file_digest"):  # 3.11+: read loop runs in C
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        h = hashlib.sha256()
         for chunk in iter(lambda: f.read(1 << 20), b""):
             h.update(chunk)
     return h.hexdigest()
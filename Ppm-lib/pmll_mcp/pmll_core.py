@@ -3,7 +3,7 @@ pmll_core.py — Persistent Memory Logic Loop (core, no torch required).
 
 Adapted from pufferlib/PMLL.py (drQedwards/PufferLib PR #1).
 Provides:
-  - Stable hashing + JSONL persistence
+  - Stable hashing (SHA-256 digests, BLAKE2b content ids) + JSONL persistence
   - PythonBackend (phi, utilization)
   - Promise queue + MemoryController
   - Backend interface and pure-Python core (Q-promise / Q_promise_lib integration lives in pmll_mcp_server.py)
@@ -13,73 +13,331 @@ License: MIT
 
 from __future__ import annotations
 
+import atexit
+import contextlib
+import itertools
 import os
+import re
+import sys
+import tempfile
 import time
 import json
 import hashlib
+import mmap
 import threading
+import weakref
+from collections import deque
+from functools import lru_cache, partial
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Protocol, runtime_checkable
+from typing import Any, BinaryIO, Deque, Dict, List, Optional, Protocol, Tuple, runtime_checkable
+
+try:  # optional accelerator for snapshot / log recovery
+    import orjson as _orjson
+except ImportError:
+    _orjson = None
+
+# A run of 20+ digits may be an integer beyond 64 bits, which orjson
+# silently turns into a float; such documents go through stdlib json.
+_BIG_INT_RE = re.compile(rb"\d{20}")
+
+
+def _json_loads(data: Any) -> Any:
+    if _orjson is not None and _BIG_INT_RE.search(data) is None:
+        return _orjson.loads(data)
+    return json.loads(data)
+
+try:  # optional compiled serializer built from Q_promise_lib/pmll_hash.pyx
+    from pmll_hash import stable_dumps as _compiled_stable_dumps
+except ImportError:
+    _compiled_stable_dumps = None
+_ORJSON_STABLE = (_orjson.OPT_SORT_KEYS | _orjson.OPT_NON_STR_KEYS) if _orjson is not None else 0
 
 
 # =============================================================================
 # Utilities: stable hashing + JSONL persistence
 # =============================================================================
 
+_stable_encode = json.JSONEncoder(
+    sort_keys=True, separators=(",", ":"), ensure_ascii=False
+).encode
+if _compiled_stable_dumps is not None:
+    # Byte-identical to the stdlib encoder above; falls back to it internally.
+    _stable_encode = _compiled_stable_dumps
+
+
+_SCALAR_JSON = {type(None): lambda o: "null", bool: lambda o: "true" if o else "false",
+                int: int.__repr__}
+
+
 def _stable_json_dumps(obj: Any) -> str:
     """Deterministic JSON serialisation for hashing."""
-    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    # Bare ints, bools and None (common promise payloads) are spelled
+    # directly; the encoder's setup costs ~10x the formatting itself.
+    # Exact type match, so int subclasses still take the encoder path.
+    fmt = _SCALAR_JSON.get(type(obj))
+    if fmt is not None:
+        return fmt(obj)
+    return _stable_encode(obj)
+
+
+def _stable_json_bytes(obj: Any) -> bytes:
+    """Sorted-key UTF-8 JSON for persistence, via orjson when installed.
+
+    Hashing keeps using ``_stable_json_dumps`` so digests do not depend on
+    whether orjson is present (its float formatting differs).
+    """
+    if _orjson is not None:
+        try:
+            return _orjson.dumps(obj, option=_ORJSON_STABLE)
+        except TypeError:  # e.g. ints beyond 64 bits; stdlib handles them
+            pass
+    return _stable_encode(obj).encode("utf-8")
+
+
+def _stable_json_line(obj: Any) -> bytes:
+    """``_stable_json_bytes(obj) + b"\\n"`` without copying the record to add it."""
+    if _orjson is not None:
+        try:
+            return _orjson.dumps(obj, option=_ORJSON_STABLE | _orjson.OPT_APPEND_NEWLINE)
+        except TypeError:
+            pass
+    return (_stable_encode(obj) + "\n").encode("utf-8")
+
+
+@lru_cache(maxsize=64)
+def _salted_prefix(salt: str) -> "hashlib._Hash":
+    """SHA-256 state with *salt* already absorbed; callers must ``.copy()`` it."""
+    return hashlib.sha256(salt.encode("utf-8"))
 
 
 def deterministic_hash(payload: Any, salt: str = "") -> str:
-    h = hashlib.sha256()
-    h.update(salt.encode("utf-8"))
+    return hash_canonical_bytes(_stable_json_dumps(payload).encode("utf-8"), salt)
+
+
+def hash_canonical_bytes(data: bytes, salt: str = "") -> str:
+    """SHA-256 of already-canonical JSON bytes (skips re-serialisation).
+
+    ``hash_canonical_bytes(_stable_json_dumps(x).encode(), salt)`` equals
+    ``deterministic_hash(x, salt)``; callers must guarantee canonical form.
+    """
+    h = _salted_prefix(salt).copy()
+    h.update(data)
+    return h.hexdigest()
+
+
+@lru_cache(maxsize=64)
+def _salted_content_prefix(salt: str) -> "hashlib._Hash":
+    return hashlib.blake2b(salt.encode("utf-8"), digest_size=16)
+
+
+def content_id(payload: Any, salt: str = "") -> str:
+    """Fast 128-bit BLAKE2b content identifier (not a MAC).
+
+    Used for ``MemoryBlock.mid`` tags; use ``deterministic_hash`` where a
+    SHA-256 digest is part of the contract.
+    """
+    h = _salted_content_prefix(salt).copy()
     h.update(_stable_json_dumps(payload).encode("utf-8"))
     return h.hexdigest()
 
 
-@dataclass
+def content_ids(payloads: List[Any], salt: str = "") -> List[str]:
+    """Batch form of ``content_id`` sharing one salted prefix lookup."""
+    prefix = _salted_content_prefix(salt)
+    out: List[str] = []
+    for payload in payloads:
+        h = prefix.copy()
+        h.update(_stable_encode(payload).encode("utf-8"))
+        out.append(h.hexdigest())
+    return out
+
+
+def _map_readonly(path: str) -> Optional[mmap.mmap]:
+    """Map *path* read-only with sequential readahead hints (None if empty)."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    for advice in ("MADV_SEQUENTIAL", "MADV_WILLNEED"):
+        if hasattr(mmap, advice):
+            mm.madvise(getattr(mmap, advice))
+    return mm
+
+
+def _loads_buffer(mm: mmap.mmap) -> Any:
+    if _orjson is not None and _BIG_INT_RE.search(mm) is None:
+        with memoryview(mm) as view:
+            return _orjson.loads(view)
+    return json.loads(mm[:])
+
+
+def prefetch_store(root: str) -> None:
+    """Warm the page cache for an existing store's snapshot and log files."""
+    for name in ("pmll_ctrl.json", "pmll_snapshot.json", "pmll_log.jsonl"):
+        path = os.path.join(root, name)
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            else:
+                while os.read(fd, 1 << 20):
+                    pass
+        finally:
+            os.close(fd)
+
+
+# Slotted dataclasses (no per-instance __dict__) where the runtime allows.
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_SLOTS)
 class MemoryBlock:
     payload: Dict[str, Any]
     mid: str
     ts: float
     meta: Optional[Dict[str, Any]] = None
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {"payload": self.payload, "mid": self.mid, "ts": self.ts, "meta": self.meta}
+
+
+def _close_writer(fh: BinaryIO, fsync: bool) -> None:
+    try:
+        fh.flush()
+        if fsync:
+            os.fsync(fh.fileno())
+    finally:
+        fh.close()
+
+
+def _call_if_alive(ref: "weakref.WeakMethod") -> None:
+    method = ref()
+    if method is not None:
+        method()
+
 
 class JSONLStore:
-    """Append-only log + optional periodic snapshot."""
+    """Append-only log + optional periodic snapshot.
+
+    Appends go through one lazily opened buffered writer; call ``flush()``
+    at the end of a batch.  ``fsync_on_commit`` additionally fsyncs there.
+    """
 
-    def __init__(self, root: str):
+    def __init__(self, root: str, fsync_on_commit: bool = False):
         self.root = root
-        os.makedirs(root, exist_ok=True)
+        if not os.path.isdir(root):  # one stat when the store already exists
+            os.makedirs(root, exist_ok=True)
         self.log_path = os.path.join(root, "pmll_log.jsonl")
         self.snapshot_path = os.path.join(root, "pmll_snapshot.json")
+        self.ctrl_snapshot_path = os.path.join(root, "pmll_ctrl.json")
+        self.fsync_on_commit = fsync_on_commit
+        self._fh: Optional[BinaryIO] = None
+        self._finalizer: Optional[weakref.finalize] = None
+
+    def _writer(self) -> BinaryIO:
+        if self._fh is None:
+            self._fh = open(self.log_path, "ab", buffering=1 << 20)
+            # Flushes and closes the file at exit or when the store is
+            # collected, without the store itself being kept alive.
+            self._finalizer = weakref.finalize(
+                self, _close_writer, self._fh, self.fsync_on_commit
+            )
+        return self._fh
 
     def append(self, block: MemoryBlock) -> None:
-        with open(self.log_path, "a", encoding="utf-8") as f:
-            f.write(_stable_json_dumps(block.__dict__) + "\n")
+        self._writer().write(_stable_json_line(block.to_dict()))
+
+    def append_many(self, blocks: List[MemoryBlock]) -> None:
+        """Append several blocks with a single write."""
+        if not blocks:
+            return
+        self._writer().write(b"".join([_stable_json_line(b.to_dict()) for b in blocks]))
+
+    def flush(self) -> None:
+        """End-of-batch boundary: push buffered appends to the OS."""
+        if self._fh is None:
+            return
+        self._fh.flush()
+        if self.fsync_on_commit:
+            os.fsync(self._fh.fileno())
+
+    def close(self) -> None:
+        if self._fh is None:
+            return
+        self._fh = None
+        self._finalizer()
 
     def save_snapshot(self, blocks: List[MemoryBlock]) -> None:
-        with open(self.snapshot_path, "w", encoding="utf-8") as f:
-            f.write(_stable_json_dumps([b.__dict__ for b in blocks]))
+        with open(self.snapshot_path, "wb") as f:
+            f.write(_stable_json_bytes([b.to_dict() for b in blocks]))
+
+    def save_controller_snapshot(self, pool_size: int, live: Dict[int, Any]) -> None:
+        """Write the live pool as JSON (atomically).
+
+        JSON rather than pickle: the store dir is user-configurable, and
+        loading a pickle from it would run whatever code it names.
+        """
+        data = _stable_json_bytes({"pool_size": pool_size, "live": sorted(live.items())})
+        # A unique temp file per call, so concurrent checkpoints (a due one
+        # and the exit hook) never write into each other's file.
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix="pmll_ctrl.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self.ctrl_snapshot_path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+            raise
+
+    def load_controller_snapshot(self) -> Optional[Dict[str, Any]]:
+        """Return ``{"pool_size": int, "live": {slot: data}}``, or None if
+        the checkpoint is absent, unreadable or malformed."""
+        if not os.path.exists(self.ctrl_snapshot_path):
+            return None
+        try:
+            mm = _map_readonly(self.ctrl_snapshot_path)
+            if mm is None:
+                return None
+            with mm:
+                state = _loads_buffer(mm)
+            pool_size = state["pool_size"]
+            live = {slot: data for slot, data in state["live"]}
+        except Exception:
+            return None
+        if type(pool_size) is not int or any(type(slot) is not int for slot in live):
+            return None
+        return {"pool_size": pool_size, "live": live}
 
     def load(self) -> List[MemoryBlock]:
+        self.flush()
         if os.path.exists(self.snapshot_path):
             try:
-                with open(self.snapshot_path, "r", encoding="utf-8") as f:
-                    arr = json.loads(f.read())
+                mm = _map_readonly(self.snapshot_path)
+                if mm is None:
+                    arr = []
+                else:
+                    with mm:
+                        arr = _loads_buffer(mm)
                 return [MemoryBlock(**x) for x in arr]
             except Exception:
                 pass
 
         blocks: List[MemoryBlock] = []
         if os.path.exists(self.log_path):
-            with open(self.log_path, "r", encoding="utf-8") as f:
-                for line in f:
+            mm = _map_readonly(self.log_path)
+            if mm is None:
+                return blocks
+            with mm:
+                for line in iter(mm.readline, b""):
                     line = line.strip()
                     if not line:
                         continue
-                    blocks.append(MemoryBlock(**json.loads(line)))
+                    blocks.append(MemoryBlock(**_json_loads(line)))
         return blocks
 
 
@@ -104,6 +362,10 @@ class PythonBackend:
     def phi(self, idx: int, n: int) -> int:
         return idx % n
 
+    def phi_many(self, ids: List[int], n: int) -> List[int]:
+        """Batch ``phi`` — one call per commit batch instead of per promise."""
+        return [i % n for i in ids]
+
     def process_promise_queue(self) -> None:
         pass
 
@@ -126,7 +388,7 @@ def make_backend(so_path: Optional[str] = None) -> PythonBackend:
 # Promise + MemoryController
 # =============================================================================
 
-@dataclass
+@dataclass(**_SLOTS)
 class Promise:
     pid: int
     data: Any
@@ -136,14 +398,37 @@ class Promise:
 
     @property
     def expired(self) -> bool:
+        return self.expired_at(time.time())
+
+    def expired_at(self, now: float) -> bool:
+        """Expiry check against a caller-supplied clock reading."""
         if self.ttl_s is None:
             return False
-        return (time.time() - self.created_ts) >= self.ttl_s
+        return (now - self.created_ts) >= self.ttl_s
+
+
+@dataclass
+class _Stripe:
+    """One stripe: a lock for a contiguous slot range plus a lock-free queue share."""
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    queue: Deque[Tuple[int, Promise]] = field(default_factory=deque)
+    live: Dict[int, Any] = field(default_factory=dict)  # non-None slots in range
+
+
+NUM_STRIPES = 8
 
 
 class MemoryController:
     """
     Thread-safe memory pool with promise queue and persistent storage.
+
+    The pool is sparse: only non-None slots are stored (in the per-stripe
+    ``live`` dicts), so memory scales with fill rather than ``pool_size``.
+
+    ``write`` is lock-free: it appends to the deque of stripe
+    ``pid % NUM_STRIPES`` (``deque.append`` is atomic).  Slot ``s`` is
+    guarded by the lock of stripe ``s // stripe_span``, so readers and
+    committers on different stripes do not contend.
     """
 
     def __init__(
@@ -152,20 +437,49 @@ class MemoryController:
         backend: Optional[PythonBackend] = None,
         store_dir: Optional[str] = None,
         compress_when_util_gt: float = 0.85,
+        fsync_on_commit: bool = False,
+        checkpoint_every: int = 0,
     ):
         self.pool_size = pool_size
         self.backend = backend or make_backend()
-        self._pool: List[Any] = [None] * pool_size
-        self._promise_queue: List[Promise] = []
-        self._lock = threading.Lock()
+        self._stripes = [_Stripe() for _ in range(NUM_STRIPES)]
+        self._stripe_span = max(1, -(-pool_size // NUM_STRIPES))
+        self._seq = itertools.count()
+        self._store_lock = threading.Lock()
         self.compress_when_util_gt = compress_when_util_gt
+        self._backend_has_util = hasattr(self.backend, "_util")
+        self._phi_many = getattr(self.backend, "phi_many", None)
+
+        self.checkpoint_every = checkpoint_every
+        self._since_checkpoint = 0
 
         self.store: Optional[JSONLStore] = None
         if store_dir:
-            self.store = JSONLStore(store_dir)
+            self.store = JSONLStore(store_dir, fsync_on_commit=fsync_on_commit)
+            state = self.store.load_controller_snapshot()
+            # Slots are phi(pid, pool_size): a checkpoint from another
+            # pool size would put data in the wrong slots.
+            if state and state["pool_size"] == pool_size:
+                self._restore(state["live"])
+            if checkpoint_every > 0:
+                # Weak, so the hook does not keep the controller (and its
+                # stripes and store) alive; dropped once it is collected.
+                hook = partial(
+                    _call_if_alive, weakref.WeakMethod(self._try_checkpoint)
+                )
+                atexit.register(hook)
+                weakref.finalize(self, atexit.unregister, hook).atexit = False
 
     # --- public API ---
 
+    def checkpoint(self) -> None:
+        """Persist the live pool so the next start skips history replay."""
+        if self.store is None:
+            return
+        with self._store_lock:
+            self._since_checkpoint = 0
+        self.store.save_controller_snapshot(self.pool_size, self.pool_snapshot())
+
     def write(
         self,
         pid: int,
@@ -173,67 +487,123 @@ class MemoryController:
         ttl_s: Optional[float] = None,
         importance: Optional[float] = None,
     ) -> None:
-        with self._lock:
-            self._promise_queue.append(
-                Promise(pid=pid, data=data, ttl_s=ttl_s, importance=importance)
-            )
+        promise = Promise(pid=pid, data=data, ttl_s=ttl_s, importance=importance)
+        self._stripes[pid % NUM_STRIPES].queue.append((next(self._seq), promise))
 
     def process_promises(self) -> int:
         """Flush the promise queue into the pool. Returns number committed."""
-        with self._lock:
-            queue = self._promise_queue[:]
-            self._promise_queue.clear()
-
-        committed = 0
-        with self._lock:
-            for p in queue:
-                if p.expired:
-                    continue
-                slot = self.backend.phi(p.pid, self.pool_size)
-                self._pool[slot] = p.data
-                committed += 1
-
-                if self.store:
-                    block = MemoryBlock(
-                        payload={"pid": p.pid, "slot": slot},
-                        mid=deterministic_hash({"pid": p.pid, "slot": slot}),
-                        ts=time.time(),
-                    )
-                    self.store.append(block)
-
-            filled = sum(1 for x in self._pool if x is not None)
-            current_util = filled / self.pool_size if self.pool_size > 0 else 0.0
-            if hasattr(self.backend, "_util"):
-                self.backend._util = current_util
-
-            if current_util > self.compress_when_util_gt:
+        drained: List[Tuple[int, Promise]] = []
+        for stripe in self._stripes:
+            pop = stripe.queue.popleft
+            while True:
                 try:
-                    self.backend.trigger_compression(current_util)
-                except Exception:
-                    self._python_compress()
+                    drained.append(pop())
+                except IndexError:
+                    break
+        # Restore global write order so the last write to a slot wins.
+        drained.sort(key=lambda item: item[0])
+
+        now = time.time()
+        live = [p for _seq, p in drained if not p.expired_at(now)]
+        n = self.pool_size
+        if self._phi_many is not None:
+            slots = self._phi_many([p.pid for p in live], n)
+        else:
+            phi = self.backend.phi
+            slots = [phi(p.pid, n) for p in live]
+
+        # Per stripe, slot -> final data: later writes to a slot in the same
+        # batch overwrite earlier ones here, so each slot is stored once.
+        by_stripe: Dict[int, Dict[int, Any]] = {}
+        payloads: List[Dict[str, Any]] = []
+        span = self._stripe_span
+        for p, slot in zip(live, slots):
+            by_stripe.setdefault(slot // span, {})[slot] = p.data
+            if self.store:
+                payloads.append({"pid": p.pid, "slot": slot})
+
+        committed = len(live)
+        for idx, final in by_stripe.items():
+            stripe = self._stripes[idx]
+            with stripe.lock:
+                live_slots = stripe.live
+                for slot, data in final.items():
+                    if data is None:
+                        live_slots.pop(slot, None)
+                    else:
+                        live_slots[slot] = data
+
+        if self.store and payloads:
+            ts = time.time()
+            blocks = [
+                MemoryBlock(payload=payload, mid=mid, ts=ts)
+                for payload, mid in zip(payloads, content_ids(payloads))
+            ]
+            with self._store_lock:
+                self.store.append_many(blocks)
+                self.store.flush()
+
+        if self.store and self.checkpoint_every > 0:
+            with self._store_lock:
+                self._since_checkpoint += committed
+                due = self._since_checkpoint >= self.checkpoint_every
+            if due:
+                # The batch is already committed; a failed checkpoint only
+                # means the next start replays more history.
+                self._try_checkpoint()
+
+        current_util = self.utilization()
+        if self._backend_has_util:
+            self.backend._util = current_util
+
+        if current_util > self.compress_when_util_gt:
+            try:
+                self.backend.trigger_compression(current_util)
+            except Exception:
+                self._python_compress()
 
         return committed
 
     def read_slot(self, slot: int) -> Any:
-        with self._lock:
-            if 0 <= slot < self.pool_size:
-                return self._pool[slot]
-            return None
+        if 0 <= slot < self.pool_size:
+            # A single dict lookup is atomic; no stripe lock needed.
+            return self._stripes[slot // self._stripe_span].live.get(slot)
+        return None
 
     def utilization(self) -> float:
-        with self._lock:
-            filled = sum(1 for x in self._pool if x is not None)
-            return filled / self.pool_size if self.pool_size > 0 else 0.0
+        if self.pool_size <= 0:
+            return 0.0
+        return sum(len(stripe.live) for stripe in self._stripes) / self.pool_size
 
     def pool_snapshot(self) -> Dict[int, Any]:
         """Return a dict of {slot: data} for all non-None slots."""
-        with self._lock:
-            return {i: v for i, v in enumerate(self._pool) if v is not None}
+        out: Dict[int, Any] = {}
+        for stripe in self._stripes:
+            with stripe.lock:
+                out.update(stripe.live)
+        return out
 
     def clear(self) -> None:
-        with self._lock:
-            self._pool = [None] * self.pool_size
-            self._promise_queue.clear()
+        with contextlib.ExitStack() as stack:
+            for stripe in self._stripes:
+                stack.enter_context(stripe.lock)
+            for stripe in self._stripes:
+                stripe.live.clear()
+                stripe.queue.clear()
+
+    def _try_checkpoint(self) -> bool:
+        """``checkpoint()`` that reports failure instead of raising."""
+        try:
+            self.checkpoint()
+        except (OSError, TypeError, ValueError):  # unwritable dir / non-JSON data
+            return False
+        return True
+
+    def _restore(self, live: Dict[int, Any]) -> None:
+        span = self._stripe_span
+        for slot, data in live.items():
+            if 0 <= slot < self.pool_size and data is not None:
+                self._stripes[slot // span].live[slot] = data
 
     def _python_compress(self) -> None:
         """Evict lowest-importance slots (placeholder strategy)."""
@@ -11,6 +11,10 @@ Usage:
     python -m pmll_mcp.pmll_mcp_server          # stdio transport
     python -m pmll_mcp.pmll_mcp_server --sse     # SSE transport
 
+Set ``PMLL_STORE_DIR`` to persist committed promises to a JSONL store; the
+live pool is checkpointed every ``PMLL_CHECKPOINT_EVERY`` commits (default
+1024) and at exit, and restored from that checkpoint on the next start.
+
 License: MIT
 """
 
@@ -20,14 +24,18 @@ import ctypes
 import json
 import os
 import sys
-from typing import Any, Dict, List, Optional
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 
 from mcp.server.fastmcp import FastMCP
 
 from .pmll_core import (
     MemoryController,
     deterministic_hash,
+    hash_canonical_bytes,
     make_backend,
+    prefetch_store,
 )
 
 # ---------------------------------------------------------------------------
@@ -38,10 +46,14 @@ _Q_SO_PATH = os.environ.get("PMLL_Q_PROMISE_SO")
 if not _Q_SO_PATH:
     _Q_SO_PATH = os.path.join(_REPO_ROOT, "Q_promise_lib", "q_promises.so")
 _MAX_CHAIN_LENGTH = 10000
+# hash_payload replies are cached only for arguments up to this many chars.
+_HASH_CACHE_MAX_CHARS = 4096
 
-# Cached ctypes library handle (lazy-loaded on first use)
-_q_lib = None
-_q_cb_type = None
+# Cached (library, callback type) pair, lazy-loaded once under _q_lib_lock.
+# One tuple, so the unlocked fast path never sees half of it published.
+_q_handle = None
+_q_lib_lock = threading.Lock()
+_Q_CALLBACK_TYPE = ctypes.CFUNCTYPE(None, ctypes.c_long, ctypes.c_char_p)
 
 # ---------------------------------------------------------------------------
 # MCP Server
@@ -56,14 +68,42 @@ mcp = FastMCP(
     ),
 )
 
+
+def _env_int(name: str, default: int) -> int:
+    """Integer environment knob; a malformed value falls back to *default*."""
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
 # Shared state: one MemoryController per server lifetime
 _mc: Optional[MemoryController] = None
 
+# Optional persistent store; its files are prefetched in the background at
+# import so the first tool call does not stall on cold page faults.
+_STORE_DIR = os.environ.get("PMLL_STORE_DIR") or None
+_PREFETCH_TIMEOUT_S = 0.5
+_CHECKPOINT_EVERY = _env_int("PMLL_CHECKPOINT_EVERY", 1024)
+_prefetch_thread: Optional[threading.Thread] = None
+if _STORE_DIR:
+    _prefetch_thread = threading.Thread(
+        target=prefetch_store, args=(_STORE_DIR,), name="pmll-prefetch", daemon=True
+    )
+    _prefetch_thread.start()
+
 
 def _get_mc() -> MemoryController:
     global _mc
     if _mc is None:
-        _mc = MemoryController(pool_size=1024, backend=make_backend(), store_dir=None)
+        if _prefetch_thread is not None:
+            _prefetch_thread.join(timeout=_PREFETCH_TIMEOUT_S)
+        _mc = MemoryController(
+            pool_size=1024,
+            backend=make_backend(),
+            store_dir=_STORE_DIR,
+            checkpoint_every=_CHECKPOINT_EVERY if _STORE_DIR else 0,
+        )
     return _mc
 
 
@@ -87,10 +127,7 @@ def memory_write(
         Confirmation message with the promise id.
     """
     mc = _get_mc()
-    try:
-        parsed = json.loads(data)
-    except (json.JSONDecodeError, TypeError):
-        parsed = data
+    parsed = _parse_payload(data)
     mc.write(pid=pid, data=parsed, ttl_s=ttl_s, importance=importance)
     return json.dumps({"status": "queued", "pid": pid})
 
@@ -189,21 +226,34 @@ def phi_slot(pid: int, pool_size: Optional[int] = None) -> str:
 
 # ── Tool: deterministic_hash ────────────────────────────────────────────────
 @mcp.tool()
-def hash_payload(payload: str, salt: str = "") -> str:
+def hash_payload(payload: str, salt: str = "", canonical: bool = False) -> str:
     """Compute a deterministic SHA-256 hash of a JSON payload.
 
     Args:
         payload: JSON-encoded data to hash.
         salt: Optional salt string.
+        canonical: Set when ``payload`` is already canonical JSON (sorted
+            keys, no whitespace); it is then hashed verbatim without a
+            parse/re-encode round-trip.
 
     Returns:
         Hex-encoded SHA-256 hash.
     """
-    try:
-        parsed = json.loads(payload)
-    except (json.JSONDecodeError, TypeError):
-        parsed = payload
-    h = deterministic_hash(parsed, salt=salt)
+    if len(payload) + len(salt) > _HASH_CACHE_MAX_CHARS:
+        # Keys are the raw argument text: only small ones are cached, so
+        # the cache stays bounded in memory, not just in entry count.
+        return _hash_payload_reply.__wrapped__(payload, salt, canonical)
+    return _hash_payload_reply(payload, salt, canonical)
+
+
+@lru_cache(maxsize=4096)
+def _hash_payload_reply(payload: str, salt: str, canonical: bool) -> str:
+    # The reply depends only on the argument text, so a repeated payload
+    # skips the parse, canonical re-encode and SHA-256 entirely.
+    if canonical:
+        h = hash_canonical_bytes(payload.encode("utf-8"), salt=salt)
+    else:
+        h = deterministic_hash(_parse_payload(payload), salt=salt)
     return json.dumps({"hash": h, "salt": salt})
 
 
@@ -212,8 +262,8 @@ def hash_payload(payload: str, salt: str = "") -> str:
 def q_promise_trace(chain_length: int) -> str:
     """Create and trace a Q-promise memory chain (from Q_promise_lib).
 
-    Allocates a linked-list chain of the given length, iterates it via
-    q_then(), and returns the resolved entries.
+    Allocates a linked-list chain of the given length, reads it back in one
+    q_mem_fill_arrays() call, and returns the resolved entries.
 
     Args:
         chain_length: Number of nodes in the memory chain (0-10000).
@@ -233,25 +283,11 @@ def q_promise_trace(chain_length: int) -> str:
     if lib is None:
         return json.dumps({"error": f"Q_promise shared library not found at {_Q_SO_PATH}. Run 'make' in Q_promise_lib/ first."})
 
-    results: List[Dict[str, Any]] = []
-
-    @CALLBACK_TYPE
-    def cb(index, payload):
-        results.append({
-            "index": index,
-            "payload": payload.decode("utf-8") if payload else None,
-        })
-
-    head = lib.q_mem_create_chain(chain_length)
-    if not head:
+    entries = _read_chain(lib, CALLBACK_TYPE, chain_length)
+    if entries is None:
         return json.dumps({"error": "Failed to allocate memory chain"})
 
-    try:
-        lib.q_then(head, cb)
-    finally:
-        lib.q_mem_free_chain(head)
-
-    return json.dumps(results)
+    return json.dumps([{"index": index, "payload": payload} for index, payload in entries])
 
 
 # ── Tool: q_promise_write ──────────────────────────────────────────────────
@@ -279,28 +315,19 @@ def q_promise_write(chain_length: int, ttl_s: float = 60.0) -> str:
     if lib is None:
         return json.dumps({"error": f"Q_promise shared library not found at {_Q_SO_PATH}. Run 'make' in Q_promise_lib/ first."})
 
-    mc = _get_mc()
-    written = [0]
-
-    @CALLBACK_TYPE
-    def cb(index, payload):
-        data = payload.decode("utf-8") if payload else None
-        mc.write(pid=int(index), data={"q_node": index, "payload": data}, ttl_s=ttl_s)
-        written[0] += 1
-
-    head = lib.q_mem_create_chain(chain_length)
-    if not head:
+    entries = _read_chain(lib, CALLBACK_TYPE, chain_length)
+    if entries is None:
         return json.dumps({"error": "Failed to allocate memory chain"})
 
-    try:
-        lib.q_then(head, cb)
-    finally:
-        lib.q_mem_free_chain(head)
+    mc = _get_mc()
+    write = mc.write
+    for index, payload in entries:
+        write(pid=index, data={"q_node": index, "payload": payload}, ttl_s=ttl_s)
 
     committed = mc.process_promises()
 
     return json.dumps({
-        "written": written[0],
+        "written": len(entries),
         "committed": committed,
         "utilization": round(mc.utilization(), 4),
     })
@@ -320,28 +347,89 @@ def _safe_serialize(obj: Any) -> Any:
     return str(obj)
 
 
-def _load_q_lib():
-    """Lazily load and cache the Q_promise shared library."""
-    global _q_lib, _q_cb_type
-    if _q_lib is not None:
-        return _q_lib, _q_cb_type
+def _read_chain(lib, cb_type, chain_length: int) -> Optional[List[Tuple[int, Optional[str]]]]:
+    """Allocate a chain, copy out its (index, payload) entries, and free it.
+
+    Uses the batch ``q_mem_fill_arrays`` entry point (one FFI crossing);
+    libraries built before it existed fall back to a per-node q_then callback.
+    Returns None if the chain could not be allocated.
+    """
+    head = lib.q_mem_create_chain(chain_length)
+    if not head:
+        return None
+
+    try:
+        if hasattr(lib, "q_mem_fill_arrays"):
+            indices = (ctypes.c_long * chain_length)()
+            payloads = (ctypes.c_char_p * chain_length)()
+            n = lib.q_mem_fill_arrays(head, indices, payloads, chain_length)
+            return [
+                (indices[i], raw.decode("utf-8") if raw else None)
+                for i, raw in zip(range(n), payloads)
+            ]
+
+        entries: List[Tuple[int, Optional[str]]] = []
+
+        @cb_type
+        def cb(index, payload):
+            entries.append((index, payload.decode("utf-8") if payload else None))
+
+        lib.q_then(head, cb)
+        return entries
+    finally:
+        lib.q_mem_free_chain(head)
+
 
-    if not os.path.exists(_Q_SO_PATH):
-        return None, None
+def _parse_payload(text: str) -> Any:
+    """Decode a JSON tool argument, or return it verbatim if it is not JSON.
 
-    lib = ctypes.CDLL(_Q_SO_PATH)
+    Stays on stdlib ``json``: orjson silently turns >64-bit integers into
+    floats, which would change the resulting hashes.
+    """
+    try:
+        return json.loads(text)
+    except (json.JSONDecodeError, TypeError):
+        return text
+
+
+def _load_q_lib():
+    """Lazily load and cache the Q_promise shared library.
+
+    The dlopen and argtypes/restype setup happen once per process; later
+    calls return the cached handle without taking the lock.
+    """
+    global _q_handle
+    handle = _q_handle
+    if handle is not None:
+        return handle
+
+    with _q_lib_lock:
+        if _q_handle is not None:
+            return _q_handle
+        if not os.path.exists(_Q_SO_PATH):
+            return None, None
+        _q_handle = (_bind_q_lib(ctypes.CDLL(_Q_SO_PATH)), _Q_CALLBACK_TYPE)
+        return _q_handle
+
+
+def _bind_q_lib(lib):
+    """Declare argtypes/restype for the Q_promise C API on *lib*."""
     lib.q_mem_create_chain.argtypes = [ctypes.c_size_t]
     lib.q_mem_create_chain.restype = ctypes.c_void_p
     lib.q_mem_free_chain.argtypes = [ctypes.c_void_p]
     lib.q_mem_free_chain.restype = None
 
-    cb_type = ctypes.CFUNCTYPE(None, ctypes.c_long, ctypes.c_char_p)
-    lib.q_then.argtypes = [ctypes.c_void_p, cb_type]
+    lib.q_then.argtypes = [ctypes.c_void_p, _Q_CALLBACK_TYPE]
     lib.q_then.restype = None
-
-    _q_lib = lib
-    _q_cb_type = cb_type
-    return lib, cb_type
+    if hasattr(lib, "q_mem_fill_arrays"):
+        lib.q_mem_fill_arrays.argtypes = [
+            ctypes.c_void_p,
+            ctypes.POINTER(ctypes.c_long),
+            ctypes.POINTER(ctypes.c_char_p),
+            ctypes.c_size_t,
+        ]
+        lib.q_mem_fill_arrays.restype = ctypes.c_size_t
+    return lib
 
 
 # ---------------------------------------------------------------------------
@@ -50,6 +50,58 @@ void q_then(QMemNode *head, QThenCallback cb) {
     }
 }
 
+static int payload_tag(const char *payload) {
+    if (!payload) return Q_TAG_OTHER;
+    if (strcmp(payload, "Known") == 0) return Q_TAG_KNOWN;
+    if (strcmp(payload, "Unknown") == 0) return Q_TAG_UNKNOWN;
+    return Q_TAG_OTHER;
+}
+
+void q_then_tag(QMemNode *head, QThenTagCallback cb) {
+    if (!cb) return;
+    for (QMemNode *node = head; node; node = node->next) {
+        cb(node->index, payload_tag(node->payload));
+    }
+}
+
+size_t q_mem_fill_arrays(const QMemNode *head, long *out_indices,
+                         const char **out_payloads, size_t capacity) {
+    size_t n = 0;
+    for (const QMemNode *node = head; node && n < capacity; node = node->next, ++n) {
+        if (out_indices)  out_indices[n]  = node->index;
+        if (out_payloads) out_payloads[n] = node->payload;
+    }
+    return n;
+}
+
+size_t q_then_collect_indices(const QMemNode *head, long *out, size_t cap) {
+    size_t n = 0;
+    for (const QMemNode *node = head; node; node = node->next, ++n) {
+        if (out && n < cap) out[n] = node->index;
+    }
+    return n;
+}
+
+int q_mem_verify_pattern(const QMemNode *head) {
+    long i = 0;
+    for (const QMemNode *node = head; node; node = node->next, ++i) {
+        const char *want = (i & 1) ? "Unknown" : "Known";
+        if (node->index != i || !node->payload || strcmp(node->payload, want) != 0)
+            return 0;
+    }
+    return 1;
+}
+
+int q_mem_run_selfcheck(size_t length) {
+    QMemNode *head = q_mem_create_chain(length);
+    if (!head) return length == 0;
+    size_t n = 0;
+    for (const QMemNode *node = head; node; node = node->next) ++n;
+    int ok = n == length && q_mem_verify_pattern(head);
+    q_mem_free_chain(head);
+    return ok;
+}
+
 void q_mem_free_chain(QMemNode *head) {
     while (head) {
         QMemNode *next = head->next;
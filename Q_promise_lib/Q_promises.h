@@ -27,12 +27,46 @@ typedef struct QMemNode {
 /** Function signature for callbacks used by q_then() */
 typedef void (*QThenCallback)(long index, const char *payload);
 
+/** Payload tags passed by q_then_tag() instead of the string itself. */
+enum { Q_TAG_KNOWN = 0, Q_TAG_UNKNOWN = 1, Q_TAG_OTHER = -1 };
+
+/** Function signature for callbacks used by q_then_tag() */
+typedef void (*QThenTagCallback)(long index, int tag);
+
 /* Allocate and initialise a memory chain of `length` nodes.         */
 QMemNode *q_mem_create_chain(size_t length);
 
 /* Iterate through the chain, invoking `cb` for each node.           */
 void q_then(QMemNode *head, QThenCallback cb);
 
+/* Like q_then(), but hands `cb` a Q_TAG_* value for the payload, so an
+ * FFI caller converts an int per node rather than a string.           */
+void q_then_tag(QMemNode *head, QThenTagCallback cb);
+
+/* Copy up to `capacity` nodes' index/payload into caller-owned arrays
+ * in one pass (no per-node callback).  Payload pointers remain owned by
+ * the chain.  Returns the number of entries written.                 */
+size_t q_mem_fill_arrays(const QMemNode *head, long *out_indices,
+                         const char **out_payloads, size_t capacity);
+
+/* Write up to `cap` node indices into `out` in one pass: q_then() +
+ * collect without a callback per node.  Like snprintf, returns the full
+ * chain length, so a result > `cap` means `out` was too small (and
+ * q_then_collect_indices(head, NULL, 0) just counts the nodes).       */
+size_t q_then_collect_indices(const QMemNode *head, long *out, size_t cap);
+
+/* Check the Known/Unknown payload pattern q_mem_create_chain() lays
+ * down (even index -> "Known", odd -> "Unknown") and that indices run
+ * 0, 1, 2, ... in one native pass.  Returns 1 if every node matches,
+ * else 0.                                                            */
+int q_mem_verify_pattern(const QMemNode *head);
+
+/* Create a chain of `length` nodes, check it with
+ * q_mem_verify_pattern() and its node count, and free it again: a whole
+ * stress round in one call.  Returns 1 on success, 0 on a mismatch or
+ * allocation failure.                                                */
+int q_mem_run_selfcheck(size_t length);
+
 /* Free the memory allocated by q_mem_create_chain().                */
 void q_mem_free_chain(QMemNode *head);
 
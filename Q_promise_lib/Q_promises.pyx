@@ -16,11 +16,19 @@ cdef extern from "Q_promises.h":
 # Internal C callback -> Python trampoline
 # -------------------------------------------------------------------
 cdef object _py_callback  # Keep a global reference to prevent GC
+cdef object _py_error     # First exception raised by the callback
 
-cdef void _c_callback(long idx, const char *payload) except *:
-    # Convert C data to Python and invoke the stored callback
-    if _py_callback is not None:
+cdef void _c_callback(long idx, const char *payload) noexcept with gil:
+    # Convert C data to Python and invoke the stored callback.  q_then()
+    # cannot propagate Python exceptions, so the first one is kept and
+    # re-raised by trace() once the walk returns.
+    global _py_error
+    if _py_callback is None or _py_error is not None:
+        return
+    try:
         _py_callback(idx, payload.decode("utf-8") if payload != NULL else None)
+    except BaseException as exc:
+        _py_error = exc
 
 # -------------------------------------------------------------------
 # Public API
@@ -35,7 +43,7 @@ def trace(size_t length, callback=None):
     callback : Callable[[int, str], None] | None
         Function invoked for each node. If omitted, prints to stdout.
     """
-    global _py_callback
+    global _py_callback, _py_error
     if callback is None:
         # Fallback simple print
         def default_cb(i, s):
@@ -48,8 +56,12 @@ def trace(size_t length, callback=None):
     if head == NULL:
         raise MemoryError("Failed to allocate memory chain")
 
+    _py_error = None
     try:
         q_then(head, _c_callback)
     finally:
         q_mem_free_chain(head)
         _py_callback = None
+    if _py_error is not None:
+        exc, _py_error = _py_error, None
+        raise exc
@@ -0,0 +1,89 @@
+# cython: language_level=3
+# pmll_hash.pyx
+# Compiled canonical-JSON serializer for Ppm-lib/pmll_mcp/pmll_core.py.
+#
+# Output is byte-identical to
+#   json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+# for str/int/float/bool/None/list/tuple/dict-with-str-keys trees; anything
+# else is handed to the stdlib encoder so digests never depend on whether
+# this extension is installed.
+import hashlib
+import json
+from json.encoder import encode_basestring
+
+_fallback = json.JSONEncoder(
+    sort_keys=True, separators=(",", ":"), ensure_ascii=False
+).encode
+
+
+class _Unsupported(Exception):
+    pass
+
+
+cdef str _float_repr(double x):
+    if x != x:
+        return "NaN"
+    if x == float("inf"):
+        return "Infinity"
+    if x == -float("inf"):
+        return "-Infinity"
+    return float.__repr__(x)
+
+
+cdef void _emit(object obj, list out) except *:
+    cdef type t = type(obj)
+    cdef bint first
+    if t is str:
+        out.append(encode_basestring(obj))
+    elif obj is None:
+        out.append("null")
+    elif obj is True:
+        out.append("true")
+    elif obj is False:
+        out.append("false")
+    elif t is int:
+        out.append(int.__repr__(obj))
+    elif t is float:
+        out.append(_float_repr(obj))
+    elif t is dict:
+        for k in obj:
+            if type(k) is not str:
+                raise _Unsupported()
+        out.append("{")
+        first = True
+        for k in sorted(obj):
+            if not first:
+                out.append(",")
+            first = False
+            out.append(encode_basestring(k))
+            out.append(":")
+            _emit(obj[k], out)
+        out.append("}")
+    elif t is list or t is tuple:
+        out.append("[")
+        first = True
+        for item in obj:
+            if not first:
+                out.append(",")
+            first = False
+            _emit(item, out)
+        out.append("]")
+    else:
+        raise _Unsupported()
+
+
+def stable_dumps(obj):
+    """Canonical JSON text for *obj* (sorted keys, compact, UTF-8 safe)."""
+    cdef list out = []
+    try:
+        _emit(obj, out)
+    except (_Unsupported, RecursionError):
+        return _fallback(obj)
+    return "".join(out)
+
+
+def stable_hash(obj, str salt=""):
+    """SHA-256 hex digest of ``salt + stable_dumps(obj)``."""
+    h = hashlib.sha256(salt.encode("utf-8"))
+    h.update(stable_dumps(obj).encode("utf-8"))
+    return h.hexdigest()
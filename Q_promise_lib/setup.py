@@ -1,16 +1,37 @@
 from setuptools import setup, Extension
+from setuptools.command.build_ext import build_ext
 from Cython.Build import cythonize
 
+
+class build_ext_with_clib(build_ext):
+    # ``build_ext --inplace`` does not build C libraries on its own.
+    def run(self):
+        self.run_command("build_clib")
+        super().run()
+
 ext = Extension(
     name="Q_promises",
     sources=["Q_promises.pyx"],
+    libraries=["q_promises_c"],
     include_dirs=["."],
     language="c",
 )
 
+# Compiled canonical-JSON serializer picked up by pmll_mcp.pmll_core.
+hash_ext = Extension(
+    name="pmll_hash",
+    sources=["pmll_hash.pyx"],
+    language="c",
+)
+
 setup(
     name="Q_promises",
     version="0.1.0",
     description="Lightweight thenable memory-chain simulator inspired by Q promises",
-    ext_modules=cythonize([ext], language_level=3),
+    # The C library is built separately and linked in: listing Q_promises.c
+    # as an extension source would clash with the C file Cython generates
+    # from Q_promises.pyx, which also goes under build/ for the same reason.
+    libraries=[("q_promises_c", {"sources": ["Q_promises.c"], "cflags": ["-fPIC"]})],
+    cmdclass={"build_ext": build_ext_with_clib},
+    ext_modules=cythonize([ext, hash_ext], language_level=3, build_dir="build"),
 )
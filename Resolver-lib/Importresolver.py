@@ -3,17 +3,26 @@ from __future__ import annotations
 
 import argparse
 import hashlib
+import io
 import json
+import mmap
 import os
 import re
 import sys
 import textwrap
+import threading
 import urllib.parse
 import zipfile
-from dataclasses import dataclass, asdict
-from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from html.parser import HTMLParser
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, fields, replace
+from functools import lru_cache
+from typing import BinaryIO, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple, Union
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from packaging.markers import Marker
 from packaging.requirements import Requirement
 from packaging.tags import Tag, sys_tags
@@ -21,18 +30,45 @@ from packaging.utils import canonicalize_name, parse_wheel_filename
 from packaging.version import InvalidVersion, Version
 import tomli_w
 
+try:  # optional fast JSON encoder (serializes dataclasses natively)
+    import orjson
+except ImportError:
+    orjson = None
+
+try:  # optional compiled link scanner built from resolver_fast.pyx (Setup.py)
+    from resolver_fast import parse_simple_html as _fast_parse_simple_html
+except ImportError:
+    _fast_parse_simple_html = None
+
 # =========================================================
 # Constants
 # =========================================================
 
 DEFAULT_UA = "PPM-Resolver/2.1 (+https://github.com/drQedwards/PPM)"
+DEFAULT_JOBS = 8
+DEFAULT_DOWNLOAD_JOBS = 4
+# Shared by every project on the machine; entries are keyed by page URL.
+DEFAULT_INDEX_CACHE = os.environ.get(
+    "PPM_INDEX_CACHE", os.path.join(os.path.expanduser("~"), ".ppm", "index_cache"))
+# Requires-Dist per wheel sha256; wheel contents never change under a digest.
+DEFAULT_REQUIRES_CACHE = os.path.join(os.path.expanduser("~"), ".ppm", "requires_cache.json")
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+SIMPLE_ACCEPT = ("application/vnd.pypi.simple.v1+json, "
+                 "application/vnd.pypi.simple.v1+html;q=0.2, text/html;q=0.01")
+DOWNLOAD_BUFFER = 1 << 22  # bytes per raw read when streaming an artifact
+RANGE_BLOCK = 1 << 16   # bytes per HTTP Range GET when reading remote wheels
+SDIST_EXTS = (".tar.gz", ".zip", ".tar.bz2", ".tar.xz")
 
 
 # =========================================================
 # Data structures
 # =========================================================
 
-@dataclass
+# Slotted dataclasses (no per-instance __dict__) where the runtime allows;
+# a resolve creates an Artifact for every file on every index page.
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(**_SLOTS)
 class Artifact:
     filename: str
     url: str
@@ -42,8 +78,18 @@ class Artifact:
     abi_tag: str | None
     plat_tag: str | None
     is_wheel: bool
+    metadata_url: str | None = None   # PEP 658 core-metadata sidecar
+
+ARTIFACT_FIELDS = tuple(f.name for f in fields(Artifact))
 
-@dataclass
+def artifact_dict(a: Artifact) -> dict:
+    # Shallow field copy; dataclasses.asdict deep-copies recursively.
+    return {k: getattr(a, k) for k in ARTIFACT_FIELDS}
+
+# Simple-index file entry: (href, filename, sha256 or None, metadata url or None)
+ListingEntry = Tuple[str, str, Optional[str], Optional[str]]
+
+@dataclass(**_SLOTS)
 class PackageLock:
     name: str       # normalized
     version: str
@@ -51,6 +97,24 @@ class PackageLock:
     artifacts: List[Artifact]
 
 
+# (resolver config, every root requirement key in order, requirement key) ->
+# [(lock, dependency names)] for the requirement's whole transitive closure;
+# reused by later resolves in-process. The full root list is part of the key
+# because sibling roots constrain which versions a closure ends up pinning.
+# Entries are private copies (see _copy_closure), so a resolver mutating its
+# locks never changes what another one gets; the oldest entry is dropped
+# past TRANSITIVE_CACHE_MAX.
+TRANSITIVE_CACHE: Dict[Tuple[Tuple[str, ...], Tuple[str, ...], str],
+                       List[Tuple[PackageLock, List[str]]]] = {}
+TRANSITIVE_CACHE_MAX = 256
+
+
+def _copy_closure(closure: List[Tuple[PackageLock, List[str]]]
+                  ) -> List[Tuple[PackageLock, List[str]]]:
+    return [(replace(p, artifacts=[replace(a) for a in p.artifacts]), list(deps))
+            for p, deps in closure]
+
+
 # =========================================================
 # Utilities
 # =========================================================
@@ -58,17 +122,96 @@ class PackageLock:
 def ensure_dir(p: str) -> None:
     os.makedirs(p, exist_ok=True)
 
+def atomic_write(path: str, data: bytes) -> None:
+    # Write beside the target and rename over it, so an interrupted run
+    # never leaves a torn lock file behind.
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
 def sha256_file(path: str, chunk: int = 1 << 20) -> str:
-    h = hashlib.sha256()
     with open(path, "rb") as f:
+        if hasattr(hashlib, "file_digest"):  # 3.11+: C loop, no per-chunk bytecode
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        # Older interpreters: hash a read-only mapping in one C call.
+        if os.fstat(f.fileno()).st_size == 0:
+            return hashlib.sha256().hexdigest()
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return hashlib.sha256(mm).hexdigest()
+        except (OSError, ValueError):
+            pass
+        h = hashlib.sha256()
         for part in iter(lambda: f.read(chunk), b""):
             h.update(part)
     return h.hexdigest()
 
+def _digest_stamp(path: str, st: Optional[os.stat_result] = None) -> str:
+    st = st or os.stat(path)
+    return f"{st.st_size} {st.st_mtime_ns}"
+
+def write_digest_sidecar(path: str, digest: str) -> None:
+    try:
+        with open(path + ".sha256", "w", encoding="utf-8") as f:
+            f.write(f"{digest} {_digest_stamp(path)}\n")
+    except OSError:
+        pass
+
+_SHA256_HEX = re.compile(r"[0-9a-f]{64}")
+
+def cached_sha256(path: str, st: Optional[os.stat_result] = None,
+                  verify: bool = False) -> str:
+    """sha256 of ``path``, memoized in a ``<path>.sha256`` sidecar.
+
+    The sidecar records the file's size and mtime; any change to the file
+    invalidates it and the digest is recomputed. ``st`` is a stat result the
+    caller already holds; ``verify`` ignores the sidecar and re-hashes.
+    """
+    if not verify:
+        try:
+            with open(path + ".sha256", "r", encoding="utf-8") as f:
+                digest, _, stamp = f.read().strip().partition(" ")
+            if stamp == _digest_stamp(path, st) and _SHA256_HEX.fullmatch(digest):
+                return digest
+        except (OSError, ValueError):  # unreadable or not UTF-8: re-hash
+            pass
+    digest = sha256_file(path)
+    write_digest_sidecar(path, digest)
+    return digest
+
 def to_simple_project_url(index: str, project: str) -> str:
-    proj = canonicalize_name(project).replace("_", "-")
+    proj = _canon(project).replace("_", "-")
     return urllib.parse.urljoin(index.rstrip("/") + "/", proj + "/")
 
+# Memoized packaging helpers: the same names, versions and wheel filenames
+# recur across index pages, extra indexes and sibling requirements.
+@lru_cache(maxsize=None)
+def _canon(name: str) -> str:
+    return canonicalize_name(name)
+
+@lru_cache(maxsize=None)
+def _version(s: str) -> Version:
+    return Version(s)
+
+@lru_cache(maxsize=None)
+def _requirement(spec: str) -> Requirement:
+    # Popular dependencies ("typing-extensions>=4") appear verbatim in many
+    # wheels' Requires-Dist; the returned object is shared, never mutated.
+    return Requirement(spec)
+
+@lru_cache(maxsize=None)
+def _wheel_info(filename: str):
+    return parse_wheel_filename(filename)
+
+@lru_cache(maxsize=1)
+def _env_tags() -> Tuple[Tag, ...]:
+    return tuple(sys_tags())
+
+def requirement_key(req: Requirement) -> str:
+    extras = ",".join(sorted(req.extras))
+    return f"{_canon(req.name)}{req.specifier}|{extras}|{req.marker or ''}"
+
 def env_mapping() -> Dict[str, str]:
     py = sys.version_info
     impl = sys.implementation.name
@@ -101,59 +244,263 @@ def is_prerelease(v: Version) -> bool:
 
 def parse_artifact_hash_from_href(href: str) -> Optional[str]:
     # PEP 503 recommends fragments like #sha256=<hex>
-    frag = urllib.parse.urlparse(href).fragment or ""
+    frag = href.partition("#")[2]
     m = re.search(r"(?:^|&)sha256=([0-9a-fA-F]{64})(?:&|$)", frag)
     return m.group(1).lower() if m else None
 
-def request_session(timeout: int, retries: int, ua: str) -> requests.Session:
+def _basename_from_url(url: str) -> str:
+    # Last path segment of an index URL, without query or fragment; the
+    # same result as basename(urlparse(url).path) without building a
+    # ParseResult on every download.
+    return url.partition("#")[0].partition("?")[0].rpartition("/")[2]
+
+def request_session(timeout: int, retries: int, ua: str,
+                    pool_size: int = DEFAULT_JOBS,
+                    hosts: int = 4) -> requests.Session:
     s = requests.Session()
     s.headers["User-Agent"] = ua
+    s.headers["Connection"] = "keep-alive"
+    # One keep-alive pool shared by all worker threads; transient connect
+    # errors and 429/5xx answers are retried by urllib3 with backoff.
+    # ``hosts`` bounds how many per-host pools are kept (indexes plus the
+    # file CDN they redirect to); ``pool_size`` is connections per host.
+    adapter = HTTPAdapter(
+        pool_connections=max(1, hosts),
+        pool_maxsize=pool_size,
+        max_retries=Retry(total=max(0, retries), backoff_factor=0.3,
+                          status_forcelist=RETRY_STATUSES,
+                          allowed_methods=frozenset({"GET"})),
+    )
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
     # Store simple settings on the session; we read them back explicitly.
     s.request_timeout = timeout          # type: ignore[attr-defined]
     s.request_retries = max(0, retries)  # type: ignore[attr-defined]
     return s
 
-def http_get_text(session: requests.Session, url: str) -> str:
+def http_get(session: requests.Session, url: str,
+             headers: Optional[Dict[str, str]] = None) -> requests.Response:
+    # Retries happen in the session's HTTPAdapter (see request_session).
     tmo = getattr(session, "request_timeout", 60)
-    tries = getattr(session, "request_retries", 2)
-    for i in range(tries + 1):
+    r = session.get(url, timeout=tmo, headers=headers)
+    r.raise_for_status()
+    return r
+
+def http_get_text(session: requests.Session, url: str) -> str:
+    return http_get(session, url).text
+
+def parse_simple_json(url: str, doc: dict) -> List[ListingEntry]:
+    # PEP 691: structured files[] with server-provided hashes and metadata flag.
+    out: List[ListingEntry] = []
+    for f in doc.get("files", []):
+        href = urllib.parse.urljoin(url, f["url"])
+        sha = (f.get("hashes") or {}).get("sha256")
+        meta = f.get("core-metadata", f.get("dist-info-metadata"))
+        meta_url = urllib.parse.urldefrag(href)[0] + ".metadata" if meta else None
+        out.append((href, f["filename"], sha.lower() if sha else None, meta_url))
+    return out
+
+class _SimpleLinkParser(HTMLParser):
+    # PEP 503 pages are a flat list of <a> tags; everything else is ignored.
+
+    def __init__(self, base_url: str) -> None:
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.out: List[ListingEntry] = []
+        self._attrs: Optional[Dict[str, Optional[str]]] = None
+        self._text: List[str] = []
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag == "a":
+            self._attrs = dict(attrs)
+            self._text = []
+
+    def handle_data(self, data: str) -> None:
+        if self._attrs is not None:
+            self._text.append(data)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag != "a" or self._attrs is None:
+            return
+        attrs, self._attrs = self._attrs, None
+        if not attrs.get("href"):
+            return
+        href = urllib.parse.urljoin(self.base_url, attrs["href"])
+        meta_flag = attrs.get("data-core-metadata", attrs.get("data-dist-info-metadata"))
+        meta = None
+        if meta_flag is not None and meta_flag.lower() != "false":
+            meta = urllib.parse.urldefrag(href)[0] + ".metadata"
+        name = "".join(self._text).strip()
+        self.out.append((href, name, parse_artifact_hash_from_href(href), meta))
+
+def parse_simple_html(url: str, text: str) -> List[ListingEntry]:
+    if _fast_parse_simple_html is not None:
+        return _fast_parse_simple_html(url, text)
+    p = _SimpleLinkParser(url)
+    p.feed(text)
+    p.close()
+    return p.out
+
+def _listing_cache_path(cache_dir: str, url: str) -> str:
+    return os.path.join(cache_dir, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+def fetch_simple_listing(session: requests.Session,
+                         url: str,
+                         cache_dir: Optional[str] = None) -> List[ListingEntry]:
+    # Return list of (href, filename, sha256 or None, PEP 658 metadata url or None).
+    # With cache_dir, the parsed listing is kept on disk with its validators
+    # and revalidated via If-None-Match / If-Modified-Since (304 = reuse).
+    headers = {"Accept": SIMPLE_ACCEPT}
+    cached = None
+    path = _listing_cache_path(cache_dir, url) if cache_dir else None
+    if path:
         try:
-            r = session.get(url, timeout=tmo)
+            with open(path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            cached = None
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+    r = http_get(session, url, headers=headers)
+    if r.status_code == 304 and cached:
+        return [tuple(e) for e in cached["listing"]]
+
+    if r.headers.get("Content-Type", "").startswith("application/vnd.pypi.simple.v1+json"):
+        listing = parse_simple_json(url, r.json())
+    else:
+        listing = parse_simple_html(url, r.text)
+
+    etag = r.headers.get("ETag")
+    last_modified = r.headers.get("Last-Modified")
+    if path and (etag or last_modified):
+        tmp = path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"url": url, "etag": etag, "last_modified": last_modified,
+                           "listing": listing}, f)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+    return listing
+
+
+class HTTPRangeFile(io.RawIOBase):
+    """Seekable read-only view of a remote file backed by HTTP Range GETs.
+
+    Lets ``zipfile`` read a wheel's central directory and one member without
+    downloading the archive. Raises ``OSError`` if the server ignores Range.
+    """
+
+    def __init__(self, session: requests.Session, url: str, block: int = RANGE_BLOCK) -> None:
+        super().__init__()
+        self.session = session
+        self.url = url
+        self.block = block
+        self.pos = 0
+        # Single cached window; the first one is the archive tail, which
+        # usually holds the whole central directory.
+        r = self._get(f"bytes=-{block}")
+        self.size = int(r.headers["Content-Range"].rsplit("/", 1)[1])
+        self.buf = r.content
+        self.buf_start = self.size - len(self.buf)
+
+    def _get(self, byte_range: str) -> requests.Response:
+        tmo = getattr(self.session, "request_timeout", 60)
+        # stream=True so a server that ignores Range doesn't send the whole body.
+        r = self.session.get(self.url, headers={"Range": byte_range}, timeout=tmo, stream=True)
+        if r.status_code != 206:
+            r.close()
             r.raise_for_status()
-            return r.text
-        except Exception:
-            if i == tries:
-                raise
-
-def fetch_simple_listing(session: requests.Session, url: str) -> List[Tuple[str, str]]:
-    # Return list of (href, filename)
-    text = http_get_text(session, url)
-    out: List[Tuple[str, str]] = []
-    # Minimal regex extraction is sufficient for PEP 503 Simple pages.
-    for m in re.finditer(r'href=[\'"]([^\'"]+)[\'"][^>]*>([^<]+)', text, re.IGNORECASE):
-        href = m.group(1)
-        name = m.group(2).strip()
-        out.append((urllib.parse.urljoin(url, href), name))
-    return out
+            raise OSError(f"server ignored Range request: {self.url}")
+        return r
+
+    def readable(self) -> bool:
+        return True
 
-def best_record_tag(tags: List[Tag], env_order: List[Tag]) -> Tuple[str|None, str|None, str|None]:
-    # Choose the first environment tag that exists in the wheel's tag set
-    for t in env_order:
-        if t in tags:
-            return t.interpreter, t.abi, t.platform
-    return None, None, None
+    def seekable(self) -> bool:
+        return True
 
-def pick_artifact(cands: List[Artifact], env_order: List[Tag]) -> Optional[Artifact]:
+    def tell(self) -> int:
+        return self.pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self.pos
+        elif whence == io.SEEK_END:
+            offset += self.size
+        self.pos = offset
+        return self.pos
+
+    def readinto(self, b) -> int:
+        n = min(len(b), self.size - self.pos)
+        if n <= 0:
+            return 0
+        if not (self.buf_start <= self.pos and self.pos + n <= self.buf_start + len(self.buf)):
+            stop = min(self.size, self.pos + max(n, self.block)) - 1
+            self.buf = self._get(f"bytes={self.pos}-{stop}").content
+            self.buf_start = self.pos
+        off = self.pos - self.buf_start
+        chunk = self.buf[off:off + n]
+        b[:len(chunk)] = chunk
+        self.pos += len(chunk)
+        return len(chunk)
+
+@lru_cache(maxsize=None)
+def sdist_version_guess(filename: str, name_key: str) -> Optional[str]:
+    # Basic sdist version parse: "<name>-<version><ext>", where the name may
+    # contain dashes/underscores, so compare it canonicalized.
+    lower = filename.lower()
+    for ext in SDIST_EXTS:
+        if lower.endswith(ext):
+            stem = filename[:-len(ext)]
+            break
+    else:
+        return None
+    for name, sep, ver in (stem.rpartition("-"), stem.partition("-")):
+        if sep and ver and _canon(name) == name_key:
+            return ver
+    parts = stem.split("-")
+    return parts[1] if len(parts) >= 2 else None
+
+def best_record_tag(tags: Iterable[Tag], env_order: List[Tag],
+                    env_index: Optional[Dict[Tag, int]] = None) -> Tuple[str|None, str|None, str|None]:
+    # Choose the best-ranked environment tag that exists in the wheel's tag set.
+    # Looking each wheel tag up in the rank dict is O(|wheel tags|), instead
+    # of scanning the (long) environment order.
+    if env_index is None:
+        env_index = {t: i for i, t in enumerate(env_order)}
+    best = min((env_index[t] for t in tags if t in env_index), default=None)
+    if best is None:
+        return None, None, None
+    t = env_order[best]
+    return t.interpreter, t.abi, t.platform
+
+@lru_cache(maxsize=None)
+def _env_index() -> Dict[Tag, int]:
+    return {t: i for i, t in enumerate(_env_tags())}
+
+@lru_cache(maxsize=None)
+def _env_record_tag(tags: FrozenSet[Tag]) -> Tuple[str|None, str|None, str|None]:
+    # Most wheels of a project share a handful of tag sets (py3-none-any,
+    # one per manylinux/macOS/Windows build), so this is nearly always a hit.
+    return best_record_tag(tags, list(_env_tags()), _env_index())
+
+def pick_artifact(cands: List[Artifact], env_order: List[Tag],
+                  env_rank: Optional[Dict[str, int]] = None) -> Optional[Artifact]:
     # Prefer wheels by env tag order; then sdists
-    wheels = [c for c in cands if c.is_wheel]
-    order = {str(t): i for i, t in enumerate(env_order)}
+    if env_rank is None:
+        env_rank = {str(t): i for i, t in enumerate(env_order)}
     def score(a: Artifact) -> int:
         if not a.py_tag:
             return 9_000_000
-        return order.get(f"{a.py_tag}-{a.abi_tag}-{a.plat_tag}", 8_000_000)
-    wheels.sort(key=score)
+        return env_rank.get(f"{a.py_tag}-{a.abi_tag}-{a.plat_tag}", 8_000_000)
+    wheels = [c for c in cands if c.is_wheel]
     if wheels:
-        return wheels[0]
+        return min(wheels, key=score)
     sdists = [c for c in cands if not c.is_wheel]
     return sdists[0] if sdists else None
 
@@ -173,24 +520,106 @@ def preferred_versions(req: Requirement, versions: List[Version]) -> List[Versio
         return sorted(viable)
     return sorted([v for v in viable if not v.is_prerelease])
 
-def parse_requires_from_wheel(path: str) -> List[str]:
+def best_version(req: Requirement, versions: Iterable[Version]) -> Optional[Version]:
+    """The last entry preferred_versions() would return, found in one pass."""
+    spec = req.specifier
+    pre_explicit = spec.prereleases is True
+    best: Optional[Version] = None
+    best_pre: Optional[Version] = None
+    for v in versions:
+        if spec and not spec.contains(v, prereleases=None):
+            continue
+        if v.is_prerelease and not pre_explicit:
+            if best_pre is None or v > best_pre:
+                best_pre = v
+        elif best is None or v > best:
+            best = v
+    # Prereleases only win when no stable version is viable.
+    return best if best is not None else best_pre
+
+def parse_requires_from_bytes(meta: bytes) -> List[str]:
+    # Requires-Dist is a header; the (often large) description body after
+    # the first blank line never needs decoding.
+    if b"\r" in meta:
+        meta = meta.replace(b"\r\n", b"\n")
+    head = meta.split(b"\n\n", 1)[0]
     reqs: List[str] = []
+    for raw in head.decode("utf-8", errors="replace").splitlines():
+        if raw.startswith("Requires-Dist: "):
+            reqs.append(raw[len("Requires-Dist: "):].strip())
+    return reqs
+
+def requires_from_zip(zf: zipfile.ZipFile, wheel_filename: Optional[str] = None) -> List[str]:
+    # PEP 427: METADATA lives in {distribution}-{version}.dist-info/, so try
+    # that member directly before scanning the archive's entries.
+    if wheel_filename:
+        parts = os.path.basename(wheel_filename).split("-", 2)
+        if len(parts) == 3:
+            try:
+                return parse_requires_from_bytes(zf.read(f"{parts[0]}-{parts[1]}.dist-info/METADATA"))
+            except KeyError:
+                pass
+    for n in zf.namelist():
+        if n.endswith(".dist-info/METADATA"):
+            return parse_requires_from_bytes(zf.read(n))
+    return []
+
+def parse_requires_from_wheel(path: Union[str, BinaryIO]) -> List[str]:
     try:
         with zipfile.ZipFile(path) as zf:
-            meta_name = None
-            for n in zf.namelist():
-                if n.endswith(".dist-info/METADATA"):
-                    meta_name = n
-                    break
-            if not meta_name:
-                return reqs
-            with zf.open(meta_name) as fp:
-                for raw in fp.read().decode("utf-8", errors="replace").splitlines():
-                    if raw.startswith("Requires-Dist: "):
-                        reqs.append(raw[len("Requires-Dist: "):].strip())
+            return requires_from_zip(zf, path if isinstance(path, str) else None)
     except Exception:
-        pass
-    return reqs
+        return []
+
+class RequiresCache:
+    """Requires-Dist lists keyed by wheel sha256, persisted as one JSON file.
+
+    Loaded on first use and written back by ``save()`` only when new
+    entries were added. Safe to share between the resolver's worker threads.
+    """
+
+    def __init__(self, path: Optional[str]) -> None:
+        self.path = path
+        self._data: Optional[Dict[str, List[str]]] = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, List[str]]:
+        if self._data is None:
+            self._data = {}
+            if self.path:
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    if isinstance(data, dict):  # anything else is a corrupt file
+                        self._data = data
+                except (OSError, ValueError):
+                    pass
+        return self._data
+
+    def get(self, digest: str) -> Optional[List[str]]:
+        if not (self.path and digest):
+            return None
+        with self._lock:
+            return self._load().get(digest.lower())
+
+    def put(self, digest: str, specs: List[str]) -> None:
+        if not (self.path and digest):
+            return
+        with self._lock:
+            self._load()[digest.lower()] = specs
+            self._dirty = True
+
+    def save(self) -> None:
+        with self._lock:
+            if not (self.path and self._dirty):
+                return
+            try:
+                ensure_dir(os.path.dirname(self.path))
+                atomic_write(self.path, json.dumps(self._data).encode("utf-8"))
+                self._dirty = False
+            except OSError:
+                pass
 
 def deduce_platform_label(primary: str, extras: Sequence[str]) -> str:
     s = " ".join([primary, *extras]).lower()
@@ -209,12 +638,18 @@ def write_lock_json(path: str, pkgs: List[PackageLock], indexes: dict) -> None:
                 "name": p.name,
                 "version": p.version,
                 "markers": p.markers,
-                "artifacts": [asdict(a) for a in p.artifacts],
+                "artifacts": p.artifacts if orjson is not None
+                             else [artifact_dict(a) for a in p.artifacts],
             } for p in pkgs
         ],
     }
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(out, f, indent=2)
+    # Both encoders must give the same bytes, so the lock file does not
+    # depend on whether orjson is installed: raw UTF-8, trailing newline.
+    if orjson is not None:
+        atomic_write(path, orjson.dumps(
+            out, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE))
+        return
+    atomic_write(path, (json.dumps(out, indent=2, ensure_ascii=False) + "\n").encode("utf-8"))
 
 def write_pylock_toml(path: str, pkgs: List[PackageLock]) -> None:
     doc = {
@@ -232,77 +667,101 @@ def write_pylock_toml(path: str, pkgs: List[PackageLock]) -> None:
             "markers": p.markers or "",
         }
         doc["packages"].append(entry)
-    with open(path, "wb") as f:
-        f.write(tomli_w.dumps(doc).encode("utf-8"))
+    atomic_write(path, tomli_w.dumps(doc).encode("utf-8"))
 
 def write_matrix_inputs(root: str, pkgs: List[PackageLock]) -> None:
     p = os.path.join(root, ".ppm", "matrix_inputs.txt")
-    with open(p, "w", encoding="utf-8") as f:
-        for pkl in pkgs:
-            for a in pkl.artifacts:
-                if a.sha256:
-                    f.write(f"{a.filename}\t{a.sha256}\n")
+    lines = [f"{a.filename}\t{a.sha256}\n"
+             for pkl in pkgs for a in pkl.artifacts if a.sha256]
+    atomic_write(p, "".join(lines).encode("utf-8"))
 
 def write_matrix_plan(root: str, platform_label: str) -> None:
     p = os.path.join(root, ".ppm", "matrix_plan.json")
-    with open(p, "w", encoding="utf-8") as f:
-        json.dump({"platform": platform_label}, f, indent=2)
-
-def write_verifier(path: str, pkgs: List[PackageLock]) -> None:
-    lock = {
-        "packages": [
-            {
-                "name": p.name,
-                "version": p.version,
-                "artifacts": [asdict(a) for a in p.artifacts],
-            } for p in pkgs
-        ]
-    }
-    body = f"""\
+    atomic_write(p, json.dumps({"platform": platform_label}, indent=2).encode("utf-8"))
+
+def write_verifier(path: str) -> None:
+    # The generated script reads <root>/.ppm/lock.json at run time instead of
+    # embedding the lock, so it stays tiny however large the lock gets. It is
+    # written to <root>, so the lock and the cache are both found next to it,
+    # whatever directory it is run from.
+    body = """\
 # Auto-generated by importresolver.py
 from __future__ import annotations
 import json, hashlib, sys, os
+from concurrent.futures import ThreadPoolExecutor
 from packaging.tags import sys_tags
 
-LOCK = {json.dumps(lock, indent=2)}
+ROOT = os.path.dirname(os.path.abspath(__file__))
+LOCK_PATH = os.path.join(ROOT, ".ppm", "lock.json")
 
 def sha256_file(path):
-    h = hashlib.sha256()
     with open(path, "rb") as f:
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        h = hashlib.sha256()
         for ch in iter(lambda: f.read(1<<20), b""):
             h.update(ch)
     return h.hexdigest()
 
-def verify(root="."):
-    tags = {{str(t) for t in sys_tags()}}
+def prefetch(paths):
+    # Queue readahead for every cached file up front so the kernel can
+    # overlap the disk reads the hashing threads are about to issue.
+    if not hasattr(os, "posix_fadvise"):
+        return
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+
+def check_artifact(root, tags, name, a):
+    # Returns (ok, messages); hashing releases the GIL, so files verify in parallel.
+    ok = True
+    msgs = []
+    py = a.get("py_tag"); abi = a.get("abi_tag"); pl = a.get("plat_tag")
+    if py and abi and pl:
+        tag = f"{py}-{abi}-{pl}"
+        if tag not in tags:
+            msgs.append(f"[!] incompatible tag for {name}: {tag}")
+            ok = False
+    sha = a.get("sha256")
+    if sha:
+        cache = os.path.join(root, ".ppm", "cache", a["filename"])
+        if os.path.exists(cache):
+            got = sha256_file(cache)
+            if got != sha:
+                msgs.append(f"[!] hash mismatch for {a['filename']}: {got} != {sha}")
+                ok = False
+        else:
+            msgs.append(f"[-] missing cache: {cache}")
+    return ok, msgs
+
+def verify(root=ROOT):
+    with open(os.path.join(root, ".ppm", "lock.json"), "r", encoding="utf-8") as _f:
+        LOCK = json.load(_f)
+    tags = {str(t) for t in sys_tags()}
+    jobs = [(p["name"], a) for p in LOCK["packages"] for a in p["artifacts"]]
+    prefetch([os.path.join(root, ".ppm", "cache", a["filename"]) for _, a in jobs if a.get("sha256")])
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 4) as ex:
+        results = list(ex.map(lambda j: check_artifact(root, tags, *j), jobs))
     ok = True
-    for p in LOCK["packages"]:
-        for a in p["artifacts"]:
-            py = a.get("py_tag"); abi = a.get("abi_tag"); pl = a.get("plat_tag")
-            if py and abi and pl:
-                tag = f"{{py}}-{{abi}}-{{pl}}"
-                if tag not in tags:
-                    print(f"[!] incompatible tag for {{p['name']}}: {{tag}}")
-                    ok = False
-            sha = a.get("sha256")
-            if sha:
-                cache = os.path.join(root, ".ppm", "cache", a["filename"])
-                if os.path.exists(cache):
-                    got = sha256_file(cache)
-                    if got != sha:
-                        print(f"[!] hash mismatch for {{a['filename']}}: {{got}} != {{sha}}")
-                        ok = False
-                else:
-                    print(f"[-] missing cache: {{cache}}")
+    for good, msgs in results:  # map() keeps lock order, so output is stable
+        for m in msgs:
+            print(m)
+        ok = ok and good
     if ok:
         print("[ok] lock verified for this environment]")
     return 0 if ok else 2
 
 if __name__ == "__main__":
-    sys.exit(verify(os.getcwd()))
+    sys.exit(verify(ROOT))
 """
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(textwrap.dedent(body))
+    atomic_write(path, textwrap.dedent(body).encode("utf-8"))
 
 
 # =========================================================
@@ -318,7 +777,13 @@ class Resolver:
                  retries: int,
                  user_agent: str,
                  strict_hash: bool,
-                 follow_transitives: bool) -> None:
+                 follow_transitives: bool,
+                 jobs: int = DEFAULT_JOBS,
+                 download_jobs: int = DEFAULT_DOWNLOAD_JOBS,
+                 index_cache_dir: Optional[str] = None,
+                 tag_prefilter: bool = True,
+                 requires_cache: Optional[str] = None,
+                 verify_cache: bool = False) -> None:
         self.root = os.path.abspath(root)
         self.index_url = index_url
         self.extra_indexes = list(extra_indexes)
@@ -327,16 +792,34 @@ class Resolver:
         self.user_agent = user_agent
         self.strict_hash = strict_hash
         self.follow_transitives = follow_transitives
+        self.jobs = max(1, jobs)
+        self.download_jobs = max(1, download_jobs)
+        self.tag_prefilter = tag_prefilter
+        # Re-hash cached artifacts instead of trusting their digest sidecars.
+        self.verify_cache = verify_cache or strict_hash
+        if os.environ.get("PPM_CACHE_KILLER"):
+            requires_cache = None
+        self.requires_cache = RequiresCache(requires_cache)
 
         self.cache_dir = os.path.join(self.root, ".ppm", "cache")
+        self.index_cache_dir = index_cache_dir or os.path.join(self.cache_dir, "simple")
         ensure_dir(self.cache_dir)
-        ensure_dir(os.path.join(self.root, ".ppm"))
+        ensure_dir(self.index_cache_dir)
 
-        self.session = request_session(timeout, retries, user_agent)
-        self.env_tags = list(sys_tags())  # ordered best-first
+        # Every index may serve pages and redirect files to its own CDN host.
+        self.session = request_session(timeout, retries, user_agent,
+                                       pool_size=max(self.jobs, self.download_jobs * 2),
+                                       hosts=2 * (1 + len(self.extra_indexes)))
+        self.env_tags = list(_env_tags())  # ordered best-first
+        self.env_rank = {str(t): i for i, t in enumerate(self.env_tags)}
 
         self.resolved: Dict[str, PackageLock] = {}
-        self.seen: Dict[str, bool] = {}
+        # name -> canonical names of its (marker-allowed) dependencies
+        self.edges: Dict[str, List[str]] = {}
+        self.cache_key = (index_url, *self.extra_indexes, str(follow_transitives),
+                          str(tag_prefilter))
+        # Simple-index URL -> listing (None if the fetch failed).
+        self.listings: Dict[str, Optional[List[ListingEntry]]] = {}
 
     def _search_urls(self, project: str) -> List[str]:
         urls = [to_simple_project_url(self.index_url, project)]
@@ -344,115 +827,211 @@ class Resolver:
             urls.append(to_simple_project_url(e, project))
         return urls
 
-    def _download(self, url: str) -> Tuple[str, str]:
+    def _fetch_listing(self, url: str) -> Optional[List[ListingEntry]]:
+        try:
+            return fetch_simple_listing(self.session, url, self.index_cache_dir)
+        except Exception:
+            return None
+
+    def _prefetch_listings(self, reqs: Sequence[Requirement], pool: ThreadPoolExecutor) -> None:
+        """Fetch the Simple pages for a whole wave of requirements concurrently."""
+        urls = list(dict.fromkeys(
+            u for r in reqs if _canon(r.name) not in self.resolved
+            for u in self._search_urls(r.name) if u not in self.listings
+        ))
+        for url, listing in zip(urls, pool.map(self._fetch_listing, urls)):
+            self.listings[url] = listing
+
+    def _download(self, url: str, expected_sha256: str = "") -> Tuple[str, str]:
         tmo = getattr(self.session, "request_timeout", 60)
         tries = getattr(self.session, "request_retries", 2)
-        fname = os.path.basename(urllib.parse.urlparse(url).path)
+        fname = _basename_from_url(url)
         local = os.path.join(self.cache_dir, fname)
 
-        if os.path.exists(local):
-            return local, sha256_file(local)
-
+        try:
+            st: Optional[os.stat_result] = os.stat(local)
+        except FileNotFoundError:
+            st = None
+        if st is not None:
+            # One stat serves as both the existence check and the sidecar's
+            # size/mtime check; the file is only re-read when that fails.
+            digest = cached_sha256(local, st, verify=self.verify_cache)
+            if not expected_sha256 or digest == expected_sha256.lower():
+                return local, digest
+            os.remove(local)  # stale or corrupt cache entry: fetch it again
+
+        # A .part file is never trusted: it is left over from a run that
+        # was interrupted mid-download.
+        part = local + ".part"
+        view = memoryview(bytearray(DOWNLOAD_BUFFER))
         for i in range(tries + 1):
-            try:
-                with self.session.get(url, stream=True, timeout=tmo) as r:
-                    r.raise_for_status()
-                    with open(local, "wb") as f:
-                        for chunk in r.iter_content(1 << 20):
-                            if chunk:
+            # Connect errors and 429/5xx answers are already retried by the
+            # session's HTTPAdapter; this loop only re-fetches a body that
+            # broke off mid-stream, which urllib3 cannot replay.
+            # Hash while streaming so the file is never read back, and
+            # only publish it under its cache name once complete.
+            h = hashlib.sha256()
+            with self.session.get(url, stream=True, timeout=tmo) as r:
+                r.raise_for_status()
+                try:
+                    # Read straight into one reused buffer rather than a
+                    # fresh bytes object per chunk.
+                    raw = r.raw
+                    with open(part, "wb") as f:
+                        if hasattr(raw, "readinto"):
+                            raw.decode_content = True
+                            while True:
+                                n = raw.readinto(view)
+                                if not n:
+                                    break
+                                chunk = view[:n]
                                 f.write(chunk)
-                return local, sha256_file(local)
-            except Exception:
-                if i == tries:
-                    raise
+                                h.update(chunk)
+                        else:  # non-urllib3 transport adapters
+                            for chunk in r.iter_content(DOWNLOAD_BUFFER):
+                                f.write(chunk)
+                                h.update(chunk)
+                except Exception:
+                    try:
+                        os.remove(part)
+                    except OSError:
+                        pass
+                    if i == tries:
+                        raise
+                    continue
+            digest = h.hexdigest()
+            if expected_sha256 and digest != expected_sha256.lower():
+                os.remove(part)
+                raise SystemExit(f"hash mismatch for {fname}: got {digest}, index says {expected_sha256}")
+            os.replace(part, local)
+            write_digest_sidecar(local, digest)
+            return local, digest
         raise RuntimeError("unreachable")
 
-    def _gather_candidates(self, req: Requirement) -> Tuple[List[Artifact], List[Version]]:
-        candidates: List[Artifact] = []
-        versions: List[Version] = []
+    def _gather_candidates(self, req: Requirement) -> Dict[Version, List[Artifact]]:
+        # Grouped by version so the chosen version's artifacts are a lookup,
+        # not a re-parse of every candidate's version string; str(Version)
+        # is rendered once per group and shared by its artifacts.
+        by_version: Dict[Version, List[Artifact]] = {}
 
+        name_key = _canon(req.name)
         for s_url in self._search_urls(req.name):
-            try:
-                listing = fetch_simple_listing(self.session, s_url)
-            except Exception:
+            if s_url not in self.listings:
+                self.listings[s_url] = self._fetch_listing(s_url)
+            listing = self.listings[s_url]
+            if listing is None:
                 continue
 
-            for href, filename in listing:
+            for href, filename, sha, meta_url in listing:
                 lower = filename.lower()
                 if lower.endswith(".whl"):
                     try:
-                        _proj, ver, build, tags = parse_wheel_filename(filename)
+                        _proj, ver, build, tags = _wheel_info(filename)
                     except Exception:
                         continue
-                    ver_s = str(ver)
-                    try:
-                        vv = Version(ver_s)
-                    except InvalidVersion:
-                        continue
-                    py_tag, abi_tag, plat_tag = best_record_tag(list(tags), self.env_tags)
-                    h = parse_artifact_hash_from_href(href) or ""
-                    candidates.append(Artifact(
+                    # parse_wheel_filename already returns a validated Version.
+                    vv = ver
+                    py_tag, abi_tag, plat_tag = _env_record_tag(tags)
+                    if py_tag is None and self.tag_prefilter:
+                        continue  # no tag this interpreter can install
+                    group = by_version.setdefault(vv, [])
+                    h = sha or ""
+                    group.append(Artifact(
                         filename=filename, url=href, sha256=h,
-                        version=ver_s, py_tag=py_tag, abi_tag=abi_tag, plat_tag=plat_tag,
-                        is_wheel=True
+                        version=group[0].version if group else str(vv), py_tag=py_tag, abi_tag=abi_tag, plat_tag=plat_tag,
+                        is_wheel=True, metadata_url=meta_url
                     ))
-                    versions.append(vv)
-                elif lower.endswith((".tar.gz", ".zip", ".tar.bz2", ".tar.xz")):
-                    # Basic sdist version parse
-                    ver_guess = None
-                    m = re.match(rf"^{re.escape(req.name)}-(.+)\.(tar\.gz|zip|tar\.bz2|tar\.xz)$",
-                                 filename, re.IGNORECASE)
-                    if m:
-                        ver_guess = m.group(1)
-                    if not ver_guess:
-                        parts = filename.split("-")
-                        if len(parts) >= 2:
-                            ver_guess = parts[1].split(".tar")[0].split(".zip")[0]
+                elif lower.endswith(SDIST_EXTS):
+                    ver_guess = sdist_version_guess(filename, name_key)
                     if not ver_guess:
                         continue
                     try:
-                        vv = Version(ver_guess)
+                        vv = _version(ver_guess)
                     except InvalidVersion:
                         continue
-                    h = parse_artifact_hash_from_href(href) or ""
-                    candidates.append(Artifact(
+                    group = by_version.setdefault(vv, [])
+                    h = sha or ""
+                    group.append(Artifact(
                         filename=filename, url=href, sha256=h,
-                        version=str(vv), py_tag=None, abi_tag=None, plat_tag=None,
+                        version=group[0].version if group else str(vv), py_tag=None, abi_tag=None, plat_tag=None,
                         is_wheel=False
                     ))
-                    versions.append(vv)
 
-        return candidates, versions
+        return by_version
 
-    def _resolve_one(self, req: Requirement) -> PackageLock:
-        name_norm = canonicalize_name(req.name)
+    def _remote_requires(self, art: Artifact) -> Optional[List[str]]:
+        """Requires-Dist of a wheel without downloading it, or None if unavailable.
+
+        Tries the PEP 658 metadata sidecar first, then reads just the
+        central directory and METADATA member through HTTP Range requests.
+        """
+        tmo = getattr(self.session, "request_timeout", 60)
+        if art.metadata_url:
+            try:
+                r = self.session.get(art.metadata_url, timeout=tmo)
+                r.raise_for_status()
+                return parse_requires_from_bytes(r.content)
+            except Exception:
+                pass
+        try:
+            with zipfile.ZipFile(HTTPRangeFile(self.session, art.url)) as zf:
+                return requires_from_zip(zf, art.filename)
+        except Exception:
+            return None
+
+    def topological_order(self) -> List[str]:
+        """Resolved names, dependencies before dependents (Kahn's algorithm)."""
+        deps = {n: {d for d in self.edges.get(n, []) if d in self.resolved and d != n}
+                for n in self.resolved}
+        users: Dict[str, List[str]] = {n: [] for n in deps}
+        for n, ds in deps.items():
+            for d in ds:
+                users[d].append(n)
+        pending = {n: len(ds) for n, ds in deps.items()}
+        ready = deque(sorted(n for n, c in pending.items() if c == 0))
+        order: List[str] = []
+        while ready:
+            n = ready.popleft()
+            order.append(n)
+            for u in users[n]:
+                pending[u] -= 1
+                if pending[u] == 0:
+                    ready.append(u)
+        # Dependency cycles are legal between Python packages; append them last.
+        order.extend(sorted(n for n, c in pending.items() if c > 0))
+        return order
+
+    def materialize(self, names: Sequence[str]) -> None:
+        """Download the locked artifacts of ``names`` into the cache in parallel."""
+        arts = [a for n in names for a in self.resolved[n].artifacts]
+        if not arts:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.download_jobs, len(arts))) as pool:
+            for a, (_local, digest) in zip(arts, pool.map(lambda a: self._download(a.url, a.sha256), arts)):
+                a.sha256 = a.sha256 or digest
+                if self.strict_hash and not a.sha256:
+                    raise SystemExit(f"Strict hash enabled: {a.filename} lacks sha256")
+
+    def _resolve_one(self, req: Requirement) -> Optional[PackageLock]:
+        """Choose and lock an artifact for ``req`` (None if already locked)."""
+        name_norm = _canon(req.name)
         if name_norm in self.resolved:
-            return self.resolved[name_norm]
-        if name_norm in self.seen:
-            raise SystemExit(f"cyclic or repeated requirement detected: {req}")
-        self.seen[name_norm] = True
+            return None
 
-        candidates, versions = self._gather_candidates(req)
-        if not candidates:
+        by_version = self._gather_candidates(req)
+        if not by_version:
             raise SystemExit(f"No candidates found for {req!s}")
 
-        versions = preferred_versions(req, versions)
-        if not versions:
+        best_v = best_version(req, by_version)
+        if best_v is None:
             raise SystemExit(f"No versions satisfy specifier: {req!s}")
 
-        best_v = versions[-1]
-        cands = [c for c in candidates if Version(c.version) == best_v]
+        cands = by_version[best_v]
 
-        chosen = pick_artifact(cands, self.env_tags)
+        chosen = pick_artifact(cands, self.env_tags, self.env_rank)
         if not chosen:
             raise SystemExit(f"No compatible artifact for {req!s} at {best_v} (candidates={len(cands)})")
 
-        local, digest = self._download(chosen.url)
-        chosen.sha256 = chosen.sha256 or digest
-
-        if self.strict_hash and not chosen.sha256:
-            raise SystemExit(f"Strict hash enabled: {chosen.filename} lacks sha256")
-
         pkl = PackageLock(
             name=name_norm,
             version=chosen.version,
@@ -460,27 +1039,107 @@ class Resolver:
             artifacts=[chosen],
         )
         self.resolved[name_norm] = pkl
+        return pkl
 
+    def _requires_of(self, req: Requirement, pkl: PackageLock) -> List[str]:
+        """Requires-Dist of a locked package (network; safe to run in the pool)."""
+        chosen = pkl.artifacts[0]
         # Transitives (wheel-only MVP)
-        if self.follow_transitives and chosen.is_wheel and marker_allows(req.marker):
-            for spec in parse_requires_from_wheel(local):
-                try:
-                    r = Requirement(spec)
-                except Exception:
-                    continue
-                if not marker_allows(r.marker):
-                    continue
-                cn = canonicalize_name(r.name)
-                if cn not in self.resolved:
-                    self._resolve_one(r)
-
-        return pkl
+        if not (self.follow_transitives and chosen.is_wheel and marker_allows(req.marker)):
+            return []
+        specs = self.requires_cache.get(chosen.sha256)
+        if specs is not None:
+            return specs
+        specs = self._remote_requires(chosen)
+        digest = chosen.sha256
+        if specs is None:
+            # No sidecar and no Range support: download now (it lands in
+            # the cache, so the final download pass reuses it).
+            local, digest = self._download(chosen.url, chosen.sha256)
+            specs = parse_requires_from_wheel(local)
+        self.requires_cache.put(digest, specs)
+        return specs
+
+    def _link_deps(self, name: str, specs: Sequence[str]) -> List[Requirement]:
+        """Record ``name``'s dependency edges; return the ones not yet locked."""
+        deps: List[Requirement] = []
+        self.edges[name] = []
+        for spec in specs:
+            try:
+                r = _requirement(spec)
+            except Exception:
+                continue
+            if not marker_allows(r.marker):
+                continue
+            cn = _canon(r.name)
+            self.edges[name].append(cn)
+            if cn not in self.resolved:
+                deps.append(r)
+        return deps
+
+    def _closure(self, name: str) -> List[Tuple[PackageLock, List[str]]]:
+        out: List[Tuple[PackageLock, List[str]]] = []
+        seen = set()
+        stack = [name]
+        while stack:
+            n = stack.pop()
+            if n in seen or n not in self.resolved:
+                continue
+            seen.add(n)
+            deps = self.edges.get(n, [])
+            out.append((self.resolved[n], deps))
+            stack.extend(deps)
+        return out
+
+    def resolve_graph(self, requirements: Iterable[str]) -> None:
+        """Discover the locked dependency graph from metadata only (no downloads)."""
+        # Breadth-first in waves: every index page a wave needs is fetched
+        # concurrently up front, artifacts are chosen sequentially so the
+        # first requirement seen for a name still wins, and then the chosen
+        # wheels' metadata is fetched concurrently again.
+        wave: List[Requirement] = []
+        allowed = [r for r in map(_requirement, requirements) if marker_allows(r.marker)]
+        roots_key = tuple(map(requirement_key, allowed))
+        for r in allowed:
+            hit = TRANSITIVE_CACHE.get((self.cache_key, roots_key, requirement_key(r)))
+            if hit is None:
+                wave.append(r)
+                continue
+            for pkl, deps in _copy_closure(hit):
+                if pkl.name not in self.resolved:
+                    self.resolved[pkl.name] = pkl
+                    self.edges[pkl.name] = deps
+        roots = list(wave)
+        # One pool for the whole walk, so worker threads (and their
+        # keep-alive connections) are reused from wave to wave.
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            while wave:
+                self._prefetch_listings(wave, pool)
+                # Dict keyed by name: a dependency shared by many packages is
+                # queued once (first spec wins, as before) instead of per parent.
+                next_wave: Dict[str, Requirement] = {}
+                locked: List[Tuple[Requirement, PackageLock]] = []
+                for r in wave:
+                    pkl = self._resolve_one(r)
+                    if pkl is not None:
+                        locked.append((r, pkl))
+                specs = pool.map(lambda rp: self._requires_of(*rp), locked)
+                for (r, pkl), sp in zip(locked, specs):
+                    for dep in self._link_deps(pkl.name, sp):
+                        next_wave.setdefault(_canon(dep.name), dep)
+                wave = list(next_wave.values())
+        for r in roots:
+            TRANSITIVE_CACHE[(self.cache_key, roots_key, requirement_key(r))] = \
+                _copy_closure(self._closure(_canon(r.name)))
+            while len(TRANSITIVE_CACHE) > TRANSITIVE_CACHE_MAX:
+                del TRANSITIVE_CACHE[next(iter(TRANSITIVE_CACHE))]
+        self.requires_cache.save()
 
     def resolve_all(self, requirements: Iterable[str]) -> List[PackageLock]:
-        for rtxt in requirements:
-            r = Requirement(rtxt)
-            if marker_allows(r.marker):
-                self._resolve_one(r)
+        self.resolve_graph(requirements)
+        # The graph only needed metadata; fetch the artifacts themselves now,
+        # leaves first.
+        self.materialize(self.topological_order())
         # Deterministic package order
         return [self.resolved[k] for k in sorted(self.resolved.keys())]
 
@@ -497,8 +1156,26 @@ def main() -> int:
     ap.add_argument("--timeout", type=int, default=60, help="HTTP timeout seconds (default: 60)")
     ap.add_argument("--retries", type=int, default=2, help="HTTP retries per request (default: 2)")
     ap.add_argument("--ua", default=DEFAULT_UA, help="HTTP User-Agent string")
+    ap.add_argument("--jobs", type=int, default=DEFAULT_JOBS,
+                    help=f"concurrent index fetches (default: {DEFAULT_JOBS})")
+    ap.add_argument("--parallel-downloads", type=int, default=DEFAULT_DOWNLOAD_JOBS,
+                    help=f"concurrent artifact downloads (default: {DEFAULT_DOWNLOAD_JOBS})")
+    ap.add_argument("--index-cache", default=DEFAULT_INDEX_CACHE,
+                    help="directory for cached Simple-index pages, shared across projects "
+                         "(default: $PPM_INDEX_CACHE or ~/.ppm/index_cache)")
+    ap.add_argument("--requires-cache", default=DEFAULT_REQUIRES_CACHE,
+                    help="JSON file of wheel Requires-Dist keyed by sha256 "
+                         "(default: ~/.ppm/requires_cache.json)")
+    ap.add_argument("--no-requires-cache", action="store_true",
+                    help="Ignore and do not update the Requires-Dist cache "
+                         "(also disabled by setting PPM_CACHE_KILLER)")
+    ap.add_argument("--no-tag-prefilter", action="store_true",
+                    help="Keep wheels with no tag matching this interpreter as candidates (debugging)")
     ap.add_argument("--no-transitives", action="store_true", help="Do not traverse Requires-Dist transitives")
-    ap.add_argument("--strict-hash", action="store_true", help="Fail if any chosen artifact lacks SHA-256")
+    ap.add_argument("--strict-hash", action="store_true",
+                    help="Fail if any chosen artifact lacks SHA-256 (implies --verify-cache)")
+    ap.add_argument("--verify-cache", action="store_true",
+                    help="Re-hash cached artifacts instead of trusting their .sha256 sidecars")
     ap.add_argument("requirements", nargs="+", help="PEP 508 requirement strings")
     args = ap.parse_args()
 
@@ -514,6 +1191,12 @@ def main() -> int:
         user_agent=args.ua,
         strict_hash=args.strict_hash,
         follow_transitives=not args.no_transitives,
+        jobs=args.jobs,
+        download_jobs=args.parallel_downloads,
+        index_cache_dir=args.index_cache,
+        tag_prefilter=not args.no_tag_prefilter,
+        requires_cache=None if args.no_requires_cache else args.requires_cache,
+        verify_cache=args.verify_cache,
     )
 
     pkgs = resolver.resolve_all(args.requirements)
@@ -522,16 +1205,20 @@ def main() -> int:
     for p in pkgs:
         p.artifacts.sort(key=lambda a: (not a.is_wheel, a.filename))
 
-    write_lock_json(os.path.join(root, ".ppm", "lock.json"), pkgs, {
-        "primary": args.index,
-        "extra": args.extra_index,  # list of extras
-    })
-    write_pylock_toml(os.path.join(root, "pylock.toml"), pkgs)
-    write_verifier(os.path.join(root, "resolver.py"), pkgs)
-
     platform_label = deduce_platform_label(args.index, args.extra_index)
-    write_matrix_inputs(root, pkgs)
-    write_matrix_plan(root, platform_label)
+    # The outputs are independent files; write them concurrently.
+    tasks = [
+        (write_lock_json, (os.path.join(root, ".ppm", "lock.json"), pkgs, {
+            "primary": args.index,
+            "extra": args.extra_index,  # list of extras
+        })),
+        (write_pylock_toml, (os.path.join(root, "pylock.toml"), pkgs)),
+        (write_verifier, (os.path.join(root, "resolver.py"),)),
+        (write_matrix_inputs, (root, pkgs)),
+        (write_matrix_plan, (root, platform_label)),
+    ]
+    with ThreadPoolExecutor(max_workers=len(tasks)) as pool:
+        list(pool.map(lambda t: t[0](*t[1]), tasks))
 
     print("[ok] wrote .ppm/lock.json")
     print("[ok] wrote pylock.toml")
@@ -32,8 +32,15 @@ ext = Extension(
     extra_link_args=extra_link_args,
 )
 
+# Pure-Cython Simple-page scanner; Importresolver.py falls back to
+# html.parser when it is not built.
+fast_ext = Extension(
+    name="resolver_fast",
+    sources=["resolver_fast.pyx"],
+)
+
 setup(
     name="importresolver",
     version="0.1.0",
-    ext_modules=cythonize([ext], language_level=3),
+    ext_modules=cythonize([ext, fast_ext], language_level=3),
 )
@@ -0,0 +1,116 @@
+# cython: language_level=3
+# resolver_fast.pyx
+# Compiled PEP 503 link scanner for Importresolver.py.
+#
+# parse_simple_html() returns the same (href, filename, sha256, metadata url)
+# entries as Importresolver.parse_simple_html for Simple pages, using plain
+# str.find scans instead of html.parser's per-token dispatch. When this
+# extension is not built the HTMLParser path is used.
+import re
+from html import unescape
+from urllib.parse import urldefrag, urljoin, urlparse
+
+_HASH_RE = re.compile(r"(?:^|&)sha256=([0-9a-fA-F]{64})(?:&|$)")
+_SPACE = " \t\r\n\f"
+
+
+cdef object _hash_from_href(str href):
+    m = _HASH_RE.search(urlparse(href).fragment or "")
+    return m.group(1).lower() if m else None
+
+
+cdef dict _attrs(str tag):
+    # ``tag`` is the text between "<a" and ">"; mirrors HTMLParser: names are
+    # lower-cased, values entity-decoded, bare attributes map to None and the
+    # last duplicate wins.
+    cdef dict out = {}
+    cdef Py_ssize_t i = 0, n = len(tag), start
+    cdef Py_UCS4 q
+    cdef str key
+    while i < n:
+        while i < n and (tag[i] in _SPACE or tag[i] == "/"):
+            i += 1
+        start = i
+        while i < n and tag[i] not in _SPACE and tag[i] != "=":
+            i += 1
+        key = tag[start:i].lower()
+        if not key:
+            i += 1
+            continue
+        while i < n and tag[i] in _SPACE:
+            i += 1
+        if i < n and tag[i] == "=":
+            i += 1
+            while i < n and tag[i] in _SPACE:
+                i += 1
+            if i < n and (tag[i] == "'" or tag[i] == '"'):
+                q = tag[i]
+                i += 1
+                start = i
+                while i < n and tag[i] != q:
+                    i += 1
+                out[key] = unescape(tag[start:i])
+                i += 1
+            else:
+                start = i
+                while i < n and tag[i] not in _SPACE:
+                    i += 1
+                out[key] = unescape(tag[start:i])
+        else:
+            out[key] = None
+    return out
+
+
+cdef Py_ssize_t _tag_end(str text, Py_ssize_t i, Py_ssize_t n):
+    # Index of the ">" closing a tag, or -1. Like HTMLParser, a quoted
+    # attribute value (e.g. data-requires-python=">=3.7") may contain ">".
+    cdef Py_UCS4 c
+    cdef bint after_eq = False
+    while i < n:
+        c = text[i]
+        if c == ">":
+            return i
+        if c == "=":
+            after_eq = True
+        elif after_eq and (c == '"' or c == "'"):
+            i = text.find(c, i + 1)
+            if i < 0:
+                return -1
+            after_eq = False
+        elif c not in _SPACE:
+            after_eq = False
+        i += 1
+    return -1
+
+
+cpdef list parse_simple_html(str url, str text):
+    cdef list out = []
+    cdef str lower = text.lower()
+    cdef Py_ssize_t pos = 0, start, end, close, n = len(text)
+    cdef dict attrs
+    while True:
+        start = lower.find("<a", pos)
+        if start < 0:
+            break
+        pos = start + 2
+        if pos < n and lower[pos] not in _SPACE and lower[pos] != ">":
+            continue  # some other tag, e.g. <abbr>
+        end = _tag_end(text, pos, n)
+        if end < 0:
+            break
+        close = lower.find("</a", end)
+        if close < 0:
+            break  # HTMLParser only emits a link on its end tag
+        attrs = _attrs(text[pos:end])
+        pos = close
+        href = attrs.get("href")
+        if not href:
+            continue
+        href = urljoin(url, href)
+        meta_flag = attrs.get("data-core-metadata", attrs.get("data-dist-info-metadata"))
+        meta = None
+        if meta_flag is not None and meta_flag.lower() != "false":
+            meta = urldefrag(href)[0] + ".metadata"
+        name = unescape(text[end + 1:close]).strip()
+        out.append((href, name, _hash_from_href(href), meta))
+    return out
@@ -12,7 +12,11 @@ This module provides a pure-Python KV store whose slot structure mirrors the
 Each KV slot tracks an index (position in the silo), the string key, the
 string value, and a ``resolved`` flag — analogous to ``init_silo()``
 allocating slots and ``update_silo()`` writing values into them
-(PMLL.c::init_silo / PMLL.c::update_silo).
+(PMLL.c::init_silo / PMLL.c::update_silo).  Like the C ``tree`` array, the
+slots are stored column-wise: parallel key/value/resolved lists indexed by
+slot position, plus a key → index map.  The silo holds at most
+``silo_size`` keys; inserting beyond that evicts the least recently used
+key and reuses its slot, so indices stay within ``[0, silo_size)``.
 
 Session isolation is achieved by keying stores on ``session_id``, so
 parallel agent tasks cannot interfere with each other.
@@ -20,25 +24,9 @@ parallel agent tasks cannot interfere with each other.
 
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-from typing import Dict, Optional, Tuple
-
-
-@dataclass
-class _KVSlot:
-    """A single KV slot, mirroring one entry in memory_silo_t.
-
-    Fields parallel PMLL.c::update_silo(silo, var, value, depth):
-      - index    → position in the silo tree array
-      - key      → symbolic variable name
-      - value    → stored value string
-      - resolved → True once a value has been committed (update_silo called)
-    """
-
-    index: int
-    key: str
-    value: str
-    resolved: bool = True
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 
 
 class PMMemoryStore:
@@ -55,10 +43,17 @@ class PMMemoryStore:
     """
 
     def __init__(self, silo_size: int = 256) -> None:
-        # Maps key → _KVSlot; order of insertion gives the slot index.
-        # Mirrors the tree array in memory_silo_t (PMLL.h).
-        self._slots: Dict[str, _KVSlot] = {}
+        # Slot columns, indexed by slot position — the tree array in
+        # memory_silo_t (PMLL.h) — plus key → slot index kept in LRU order
+        # (least recently used first) and a free list of evicted slots.
+        self._keys: List[str] = []
+        self._values: List[Optional[str]] = []
+        self._resolved: List[bool] = []
+        self._key_to_idx: "OrderedDict[str, int]" = OrderedDict()
+        self._free: List[int] = []
         self.silo_size = silo_size
+        # Keys dropped to stay within silo_size over the store's lifetime.
+        self.evictions = 0
 
     # ------------------------------------------------------------------
     # Core operations
@@ -70,9 +65,10 @@ class PMMemoryStore:
         Returns:
             (hit, value, index) where ``hit`` is True when the key is cached.
         """
-        slot = self._slots.get(key)
-        if slot is not None and slot.resolved:
-            return True, slot.value, slot.index
+        i = self._key_to_idx.get(key)
+        if i is not None and self._resolved[i]:
+            self._key_to_idx.move_to_end(key)
+            return True, self._values[i], i
         return False, None, None
 
     def set(self, key: str, value: str) -> int:
@@ -84,15 +80,37 @@ class PMMemoryStore:
         Returns:
             The slot index for the stored entry.
         """
-        if key in self._slots:
+        i = self._key_to_idx.get(key)
+        if i is not None:
             # Update existing slot in-place (Ouroboros cache update).
-            self._slots[key].value = value
-            self._slots[key].resolved = True
-            return self._slots[key].index
-
-        index = len(self._slots)
-        self._slots[key] = _KVSlot(index=index, key=key, value=value)
-        return index
+            self._values[i] = value
+            self._resolved[i] = True
+            self._key_to_idx.move_to_end(key)
+            return i
+
+        while self._key_to_idx and len(self._key_to_idx) >= self.silo_size:
+            self._evict_lru()
+        if self._free:
+            i = self._free.pop()
+            self._keys[i] = key
+            self._values[i] = value
+            self._resolved[i] = True
+        else:
+            i = len(self._keys)
+            self._keys.append(key)
+            self._values.append(value)
+            self._resolved.append(True)
+        self._key_to_idx[key] = i
+        return i
+
+    def _evict_lru(self) -> None:
+        """Drop the least recently used key and free its slot for reuse."""
+        _key, i = self._key_to_idx.popitem(last=False)
+        self._keys[i] = ""
+        self._values[i] = None
+        self._resolved[i] = False
+        self._free.append(i)
+        self.evictions += 1
 
     def flush(self) -> int:
         """Clear all KV slots for this session.
@@ -100,8 +118,12 @@ class PMMemoryStore:
         Returns:
             The number of slots that were cleared.
         """
-        count = len(self._slots)
-        self._slots.clear()
+        count = len(self._key_to_idx)
+        self._keys.clear()
+        self._values.clear()
+        self._resolved.clear()
+        self._key_to_idx.clear()
+        self._free.clear()
         return count
 
     # ------------------------------------------------------------------
@@ -109,25 +131,30 @@ class PMMemoryStore:
     # ------------------------------------------------------------------
 
     def __len__(self) -> int:
-        return len(self._slots)
+        return len(self._key_to_idx)
 
     def __contains__(self, key: object) -> bool:
-        return key in self._slots
+        return key in self._key_to_idx
 
 
 # Module-level registry: session_id → PMMemoryStore
 # Mirrors the global silo pool managed by pml_t in PMLL.h.
 _session_stores: Dict[str, PMMemoryStore] = {}
+# Concurrent tool calls must not create two stores for one session.
+_registry_lock = threading.Lock()
 
 
 def get_store(session_id: str, silo_size: int = 256) -> PMMemoryStore:
     """Return (or lazily create) the store for *session_id*."""
-    if session_id not in _session_stores:
-        _session_stores[session_id] = PMMemoryStore(silo_size=silo_size)
-    return _session_stores[session_id]
+    with _registry_lock:
+        store = _session_stores.get(session_id)
+        if store is None:
+            store = _session_stores[session_id] = PMMemoryStore(silo_size=silo_size)
+        return store
 
 
 def drop_store(session_id: str) -> int:
     """Remove the store for *session_id*, returning the cleared slot count."""
-    store = _session_stores.pop(session_id, None)
+    with _registry_lock:
+        store = _session_stores.pop(session_id, None)
     return len(store) if store is not None else 0
@@ -325,28 +325,32 @@ def prune_stale_links(
     """Remove decayed edges and orphan nodes."""
     graph = _get_graph(session_id)
     cutoff = threshold if threshold is not None else STALE_THRESHOLD
-    to_remove: List[str] = []
 
-    for edge_id, edge in graph.edges.items():
-        if _decay_weight(edge) < cutoff:
-            to_remove.append(edge_id)
-
-    for eid in to_remove:
-        del graph.edges[eid]
+    # Rebuild both tables in one pass each instead of deleting entry by
+    # entry; the linked-node set makes the orphan test O(1) per node.
+    edges = {
+        eid: edge
+        for eid, edge in graph.edges.items()
+        if not _decay_weight(edge) < cutoff
+    }
+    removed_edges = len(graph.edges) - len(edges)
+    graph.edges = edges
 
-    orphans = [
-        nid
+    linked = {e.source for e in edges.values()} | {e.target for e in edges.values()}
+    now = time.time()
+    nodes = {
+        nid: node
         for nid, node in graph.nodes.items()
         if (
-            not _get_edges_for_node(graph, nid)
-            and node.access_count <= 1
-            and time.time() - node.last_accessed > 7 * 86400
+            nid in linked
+            or node.access_count > 1
+            or now - node.last_accessed <= 7 * 86400
         )
-    ]
-    for nid in orphans:
-        del graph.nodes[nid]
+    }
+    orphans = len(graph.nodes) - len(nodes)
+    graph.nodes = nodes
 
-    return {"removed": len(to_remove) + len(orphans), "remaining": len(graph.edges)}
+    return {"removed": removed_edges + orphans, "remaining": len(graph.edges)}
 
 
 def add_interlinked_context(
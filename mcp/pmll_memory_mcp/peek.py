@@ -65,9 +65,8 @@ def peek_context(
     if hit:
         return {"hit": True, "value": value, "index": index}
 
-    # Stage 2: Q-promise in-flight check
-    found, status, _payload = promise_registry.peek_promise(key)
-    if found and status == "pending":
+    # Stage 2: Q-promise in-flight check (one dict probe, no lock)
+    if promise_registry.is_pending(key):
         return {"hit": True, "status": "pending", "promise_id": key}
 
     # Stage 3: Full miss — caller proceeds with the actual tool call
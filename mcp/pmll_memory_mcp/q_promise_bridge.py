@@ -16,11 +16,14 @@ each promise starts as ``"pending"`` (``QMemNode.payload == NULL``) and
 transitions to ``"resolved"`` once ``resolve()`` is called with a payload.
 
 The ``peek_promise()`` method is a non-destructive status check — the
-Python equivalent of walking the chain without modifying it.
+Python equivalent of walking the chain without modifying it.  Callers that
+need the payload use ``await_promise()``, which blocks on the node's event
+until ``resolve()`` sets it instead of polling ``peek_promise()``.
 """
 
 from __future__ import annotations
 
+import threading
 from dataclasses import dataclass, field
 from typing import Dict, Optional
 
@@ -33,11 +36,15 @@ class _QPromise:
       - promise_id  → logical identifier (replaces the numeric ``index``)
       - status      → ``"pending"`` | ``"resolved"``  (NULL vs non-NULL payload)
       - payload     → resolved data string, or None while pending
+      - event       → set once resolved; waiters block on it
     """
 
     promise_id: str
     status: str = "pending"  # "pending" | "resolved"
     payload: Optional[str] = None
+    event: threading.Event = field(
+        default_factory=threading.Event, repr=False, compare=False
+    )
 
 
 class QPromiseRegistry:
@@ -47,6 +54,7 @@ class QPromiseRegistry:
       - ``register()``      — allocate a new pending node
       - ``resolve()``       — write the payload (analogous to q_then callback)
       - ``peek_promise()``  — read status without consuming the entry
+      - ``await_promise()`` — block until resolved (or timeout)
 
     Multiple sessions share a single registry; the ``promise_id`` is the
     caller's responsibility to namespace (e.g. ``"{session_id}:{key}"``).
@@ -54,14 +62,23 @@ class QPromiseRegistry:
 
     def __init__(self) -> None:
         self._promises: Dict[str, _QPromise] = {}
+        self._lock = threading.Lock()
 
     # ------------------------------------------------------------------
     # Core operations
     # ------------------------------------------------------------------
 
     def register(self, promise_id: str) -> None:
-        """Add a new pending promise (allocate a QMemNode with NULL payload)."""
-        self._promises[promise_id] = _QPromise(promise_id=promise_id)
+        """Add a new pending promise (allocate a QMemNode with NULL payload).
+
+        Registering an ID that is still pending keeps the existing entry, so
+        threads already in ``await_promise()`` are woken by its ``resolve()``.
+        A resolved entry is replaced by a fresh pending one.
+        """
+        with self._lock:
+            existing = self._promises.get(promise_id)
+            if existing is None or existing.status != "pending":
+                self._promises[promise_id] = _QPromise(promise_id=promise_id)
 
     def resolve(self, promise_id: str, payload: str) -> bool:
         """Mark *promise_id* as resolved with *payload*.
@@ -71,11 +88,13 @@ class QPromiseRegistry:
         Returns:
             True if the promise existed and was resolved; False if unknown.
         """
-        promise = self._promises.get(promise_id)
-        if promise is None:
-            return False
-        promise.status = "resolved"
-        promise.payload = payload
+        with self._lock:
+            promise = self._promises.get(promise_id)
+            if promise is None:
+                return False
+            promise.payload = payload
+            promise.status = "resolved"
+        promise.event.set()
         return True
 
     def peek_promise(
@@ -87,10 +106,39 @@ class QPromiseRegistry:
             (found, status, payload) — ``found`` is False when the promise
             ID is unknown.
         """
+        with self._lock:
+            promise = self._promises.get(promise_id)
+            if promise is None:
+                return False, None, None
+            return True, promise.status, promise.payload
+
+    def is_pending(self, promise_id: str) -> bool:
+        """True if *promise_id* is registered and not yet resolved.
+
+        Lock-free: a single ``dict.get`` is atomic, and this is the hot
+        check behind every ``peek_context()`` miss.
+        """
         promise = self._promises.get(promise_id)
+        return promise is not None and promise.status == "pending"
+
+    def await_promise(
+        self, promise_id: str, timeout: Optional[float] = None
+    ) -> tuple[bool, Optional[str], Optional[str]]:
+        """Block until *promise_id* resolves or *timeout* seconds pass.
+
+        Returns:
+            The same ``(found, status, payload)`` triple as
+            ``peek_promise()``, for the entry that was waited on (not one
+            registered under the same ID since); ``status`` is still
+            ``"pending"`` on timeout.
+        """
+        with self._lock:
+            promise = self._promises.get(promise_id)
         if promise is None:
             return False, None, None
-        return True, promise.status, promise.payload
+        promise.event.wait(timeout)
+        with self._lock:
+            return True, promise.status, promise.payload
 
     # ------------------------------------------------------------------
     # Introspection helpers
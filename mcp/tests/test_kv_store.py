@@ -120,6 +120,43 @@ class TestPMMemoryStoreFlush:
         assert hit is False
 
 
+class TestPMMemoryStoreEviction:
+    def test_len_bounded_by_silo_size(self):
+        store = PMMemoryStore(silo_size=3)
+        for i in range(10):
+            store.set(f"k{i}", str(i))
+        assert len(store) == 3
+        assert [k for k in ("k7", "k8", "k9") if k in store] == ["k7", "k8", "k9"]
+
+    def test_least_recently_used_is_evicted(self):
+        store = PMMemoryStore(silo_size=2)
+        store.set("a", "1")
+        store.set("b", "2")
+        store.peek("a")  # refresh a; b is now the LRU key
+        store.set("c", "3")
+        assert "a" in store
+        assert "b" not in store
+        assert store.peek("c")[0] is True
+
+    def test_eviction_under_silo_pressure(self):
+        store = PMMemoryStore(silo_size=8)
+        indices = {store.set(f"k{i}", str(i)) for i in range(100)}
+        assert len(store) == 8
+        assert store.evictions == 92
+        assert indices == set(range(8))
+        assert store.peek("k99") == (True, "99", store.peek("k99")[2])
+        assert store.peek("k0")[0] is False
+
+    def test_evicted_slot_index_is_reused(self):
+        store = PMMemoryStore(silo_size=2)
+        store.set("a", "1")
+        store.set("b", "2")
+        idx = store.set("c", "3")
+        assert idx == 0  # took over a's slot
+        _, _, idx_b = store.peek("b")
+        assert idx_b == 1
+
+
 # ---------------------------------------------------------------------------
 # Module-level registry (session isolation)
 # ---------------------------------------------------------------------------
@@ -157,3 +194,10 @@ class TestSessionIsolation:
     def test_silo_size_respected(self):
         store = get_store("sized-session", silo_size=512)
         assert store.silo_size == 512
+
+    def test_concurrent_get_store_shares_one_store(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            stores = list(pool.map(lambda _: get_store("racy-session"), range(64)))
+        assert all(s is stores[0] for s in stores)
@@ -199,6 +199,22 @@ class TestPruneStaleLinks:
         assert result["removed"] == 0
         assert result["remaining"] == 1
 
+    def test_removes_decayed_edges_and_old_orphans(self):
+        import time
+
+        n1 = upsert_node("s1", "concept", "a", "a")
+        n2 = upsert_node("s1", "concept", "b", "b")
+        n3 = upsert_node("s1", "concept", "c", "c")
+        create_relation("s1", n1.id, n2.id, "relates_to")
+        old = time.time() - 365 * 86400
+        for edge in _graph_stores["s1"].edges.values():
+            edge.created_at = old
+        n1.last_accessed = n3.last_accessed = old
+        result = prune_stale_links("s1")
+        # The edge decayed away; a and c are now stale orphans, b is recent.
+        assert result == {"removed": 3, "remaining": 0}
+        assert set(_graph_stores["s1"].nodes) == {n2.id}
+
 
 # ---------------------------------------------------------------------------
 # Memory Graph: add_interlinked_context
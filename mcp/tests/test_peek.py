@@ -5,6 +5,7 @@ Validates hit/miss/pending return values from the deduplication guard.
 """
 
 import sys
+import time
 import os
 
 import pytest
@@ -17,16 +18,24 @@ from pmll_memory_mcp.q_promise_bridge import QPromiseRegistry
 from pmll_memory_mcp.peek import peek_context
 
 
-@pytest.fixture()
+@pytest.fixture(scope="module")
 def store():
     return PMMemoryStore()
 
 
-@pytest.fixture()
+@pytest.fixture(scope="module")
 def registry():
     return QPromiseRegistry()
 
 
+@pytest.fixture(autouse=True)
+def _reset(store, registry):
+    # Module-scoped instances, emptied before every test.
+    store.flush()
+    registry._promises.clear()
+    yield
+
+
 # ---------------------------------------------------------------------------
 # peek_context tests
 # ---------------------------------------------------------------------------
@@ -78,3 +87,45 @@ class TestPeekContextFullMiss:
         peek_context("new-key", "session-1", store, registry)
         hit, _, _ = store.peek("new-key")
         assert hit is False
+
+
+class TestQPromiseAwait:
+    def test_await_wakes_on_resolve(self, registry):
+        import threading
+
+        registry.register("slow")
+        timer = threading.Timer(0.05, registry.resolve, args=("slow", "done"))
+        timer.start()
+        found, status, payload = registry.await_promise("slow", timeout=5)
+        timer.join()
+        assert (found, status, payload) == (True, "resolved", "done")
+
+    def test_await_times_out_while_pending(self, registry):
+        registry.register("stuck")
+        assert registry.await_promise("stuck", timeout=0.01) == (True, "pending", None)
+
+    def test_await_unknown_promise(self, registry):
+        assert registry.await_promise("ghost", timeout=0) == (False, None, None)
+
+    def test_reregister_while_waiter_blocked(self, registry):
+        import threading
+
+        registry.register("rereg")
+        result = []
+        waiter = threading.Thread(
+            target=lambda: result.append(registry.await_promise("rereg")),
+            daemon=True,
+        )
+        waiter.start()
+        time.sleep(0.05)
+        registry.register("rereg")
+        registry.resolve("rereg", "done")
+        waiter.join(timeout=5)
+        assert not waiter.is_alive()
+        assert result == [(True, "resolved", "done")]
+
+    def test_reregister_resolved_promise_starts_pending(self, registry):
+        registry.register("again")
+        registry.resolve("again", "first")
+        registry.register("again")
+        assert registry.peek_promise("again") == (True, "pending", None)
@@ -6,36 +6,71 @@ Delegates to the full CLI implementation in Ppm-lib/Ppm-cli.py.
 from __future__ import annotations
 
 import argparse
-import hashlib
+import functools
+import io
 import json
 import os
-import shutil
-import subprocess
+import re
 import sys
-import urllib.request
-import urllib.error
+import types
 
+# hashlib, mmap, shutil, subprocess, threading, http.client, urllib and
+# concurrent.futures are imported inside the commands that need them, so
+# ``ppm --help`` and the local-only commands do not pay for the network
+# and TLS stack at startup.
 
+try:  # optional fast JSON codec (pip install ppm[fast])
+    import orjson
+except ImportError:
+    orjson = None
+
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+try:  # stdlib on 3.11+
+    import tomllib
+except ImportError:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+
+@functools.lru_cache(maxsize=4)
 def _project_paths(root):
+    # Cached per root, so handed out read-only.  Only the root join needs
+    # os.path.join's separator handling; the rest are known basenames.
     ppm_dir = os.path.join(root, ".ppm")
-    return {
+    sep = os.sep
+    return types.MappingProxyType({
         "ppm_dir": ppm_dir,
-        "lock": os.path.join(ppm_dir, "lock.json"),
-        "ledger": os.path.join(ppm_dir, "ledger.jsonl"),
-        "state": os.path.join(ppm_dir, "state.json"),
-    }
+        "lock": f"{ppm_dir}{sep}lock.json",
+        "ledger": f"{ppm_dir}{sep}ledger.jsonl",
+        "state": f"{ppm_dir}{sep}state.json",
+    })
 
 
 def _ensure_init(root):
     p = _project_paths(root)
-    os.makedirs(p["ppm_dir"], exist_ok=True)
-    for path in [p["lock"], p["ledger"], p["state"]]:
-        if not os.path.exists(path):
+    # One directory listing answers all three existence checks; the usual
+    # already-initialized case makes no further syscalls.
+    try:
+        with os.scandir(p["ppm_dir"]) as it:
+            present = {e.name for e in it}
+    except FileNotFoundError:
+        os.makedirs(p["ppm_dir"], exist_ok=True)
+        present = set()
+    for path in (p["lock"], p["ledger"], p["state"]):
+        if os.path.basename(path) in present:
+            continue
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        except FileExistsError:  # created concurrently
+            continue
+        try:
             if path.endswith(".json"):
-                with open(path, "w") as f:
-                    json.dump({}, f)
-            else:
-                open(path, "a").close()
+                os.write(fd, b"{}")
+        finally:
+            os.close(fd)
     return p
 
 
@@ -46,28 +81,21 @@ def cmd_resolve(args):
     lock_path = os.path.join(root, "PPM.lock")
 
     deps = {}
-    if os.path.exists(toml_path):
-        with open(toml_path, "r") as f:
-            content = f.read()
-        # Minimal TOML parser for [tool.ppm.dependencies]
-        in_deps = False
-        for line in content.splitlines():
-            stripped = line.strip()
-            if stripped == "[tool.ppm.dependencies]":
-                in_deps = True
-                continue
-            if stripped.startswith("[") and in_deps:
-                in_deps = False
-                continue
-            if in_deps and "=" in stripped and not stripped.startswith("#"):
-                key, val = stripped.split("=", 1)
-                key = key.strip()
-                val = val.strip().strip('"').strip("'")
-                deps[key] = {"version": val, "resolved": True}
+    for key, val in _toml_section(toml_path, "tool.ppm.dependencies").items():
+        if isinstance(val, dict):  # name = { version = "..." }
+            val = val.get("version", "")
+        deps[key] = {"version": str(val), "resolved": True}
 
     lock = {"packages": deps, "metadata": {"generator": "ppm", "version": "0.0.3-dev"}}
-    with open(lock_path, "w") as f:
-        json.dump(lock, f, indent=2, sort_keys=True)
+    # Same bytes from either encoder: raw UTF-8 and a trailing newline.
+    if orjson is not None:
+        data = orjson.dumps(lock, option=orjson.OPT_SORT_KEYS | orjson.OPT_INDENT_2
+                            | orjson.OPT_APPEND_NEWLINE)
+    else:
+        data = (json.dumps(lock, indent=2, sort_keys=True, ensure_ascii=False)
+                + "\n").encode("utf-8")
+    with open(lock_path, "wb") as f:
+        f.write(data)
     print(f"Resolved {len(deps)} dependencies → {lock_path}")
 
 
@@ -76,14 +104,22 @@ def cmd_lock(args):
     root = args.root
     lock_path = os.path.join(root, "PPM.lock")
     if os.path.exists(lock_path):
-        with open(lock_path, "r") as f:
-            lock = json.load(f)
+        with open(lock_path, "rb") as f:
+            lock = _json_loads(f.read())
         print(f"Lock file present with {len(lock.get('packages', {}))} packages.")
     else:
         print("No PPM.lock found. Run `ppm resolve` first.")
         sys.exit(1)
 
 
+@functools.lru_cache(maxsize=8)
+def _which(cmd, _path):
+    # Keyed on $PATH so a changed PATH is searched again.
+    import shutil
+
+    return shutil.which(cmd, path=_path)
+
+
 def cmd_doctor(args):
     """Diagnose the project environment."""
     root = args.root
@@ -108,7 +144,7 @@ def cmd_doctor(args):
     print(f"✅  Python {sys.version.split()[0]}")
 
     # Check C compiler
-    if os.system("cc --version >/dev/null 2>&1") == 0:
+    if _which("cc", os.environ.get("PATH")):
         print("✅  C compiler available")
     else:
         print("❌  No C compiler in PATH")
@@ -131,8 +167,8 @@ def _read_json_field(json_path, *keys):
     if not os.path.exists(json_path):
         return None
     try:
-        with open(json_path, "r") as f:
-            data = json.load(f)
+        with open(json_path, "rb") as f:
+            data = _json_loads(f.read())
         for key in keys:
             if not isinstance(data, dict):
                 return None
@@ -330,6 +366,9 @@ def cmd_publish_mcp(args):
     Pre-flight: validates metadata and checks for server.json, then
     delegates to the external ``mcp-publisher publish`` CLI.
     """
+    import shutil
+    import subprocess
+
     root = args.root
 
     # --- pre-flight validation ------------------------------------------------
@@ -388,7 +427,8 @@ def cmd_publish_mcp(args):
 def cmd_build(args):
     """Build wheels (stub)."""
     out = args.out or "dist/"
-    os.makedirs(out, exist_ok=True)
+    if not os.path.isdir(out):  # one stat in the usual already-there case
+        os.makedirs(out, exist_ok=True)
     print(f"Build output → {out} (stub — no packages to build yet)")
 
 
@@ -401,48 +441,136 @@ def cmd_run(args):
     """Run a script defined in PPM.toml."""
     script = args.script
     if script == "test":
+        # Resolve once through the memoized lookup, then exec the absolute
+        # path; execvp would repeat the same walk over $PATH.
+        pytest_path = _which("pytest", os.environ.get("PATH"))
+        if pytest_path:
+            os.execv(pytest_path, [pytest_path, "-q"])
         os.execvp("pytest", ["pytest", "-q"])
     else:
         print(f"Unknown script: {script}")
         sys.exit(1)
 
 
-def _read_toml_field(toml_path, section_prefix, key):
-    """Minimal TOML reader: extract a key from lines under [section_prefix]."""
-    if not os.path.exists(toml_path):
+@functools.lru_cache(maxsize=8)
+def _parse_toml(toml_path, _mtime_ns, _size):
+    # Keyed on the file's stat so an edited PPM.toml is re-read.
+    with open(toml_path, "rb") as f:
+        return tomllib.load(f)
+
+
+def _load_toml(toml_path, st):
+    """Parsed PPM.toml, or None when invalid or no TOML parser."""
+    if tomllib is None:
         return None
-    in_section = False
+    try:
+        return _parse_toml(toml_path, st.st_mtime_ns, st.st_size)
+    except (OSError, tomllib.TOMLDecodeError):
+        return None
+
+
+# ``key = value`` line (not a comment); one C-level match per line.  A
+# quoted value is captured without its quotes or any trailing comment.
+_TOML_KV_RE = re.compile(
+    r"""\s*([^#=\s][^=]*?)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^#]*?))\s*(?:#.*)?$""")
+# ``[table]`` header, allowing inner padding and a trailing comment.
+_TOML_HEADER_RE = re.compile(r"\s*\[\s*([^\[\]\s]+)\s*\]\s*(?:#.*)?$")
+
+
+@functools.lru_cache(maxsize=8)
+def _scan_toml_section(toml_path, section, _mtime_ns=None, _size=None):
+    """Minimal TOML reader: string values of the lines under [section]."""
     with open(toml_path, "r") as f:
-        for line in f:
-            stripped = line.strip()
-            if stripped.startswith("["):
-                in_section = stripped.startswith(f"[{section_prefix}]")
-                continue
-            if in_section and "=" in stripped and not stripped.startswith("#"):
-                k, v = stripped.split("=", 1)
-                if k.strip() == key:
-                    return v.strip().strip('"').strip("'")
-    return None
+        data = f.read()
+    out = {}
+    in_section = False
+    # One read, then a cursor over the buffer: no per-line file reads and
+    # no intermediate list from splitlines().
+    cur, n = 0, len(data)
+    while cur < n:
+        end = data.find("\n", cur)
+        if end < 0:
+            end = n
+        line = data[cur:end]
+        cur = end + 1
+        if line.lstrip().startswith("["):
+            m = _TOML_HEADER_RE.match(line)
+            in_section = m is not None and m.group(1) == section
+        elif in_section:
+            m = _TOML_KV_RE.match(line)
+            if m:
+                val = m.group(2)
+                if val is None:
+                    val = m.group(3) if m.group(3) is not None else m.group(4)
+                out.setdefault(m.group(1), val)
+    return out
+
+
+def _toml_section(toml_path, section):
+    """The ``[section]`` table of *toml_path* (dotted name), or {}."""
+    # One stat both answers "missing?" and keys the parse caches, so the
+    # name/version/registry lookups of a publish share a single parse.
+    try:
+        st = os.stat(toml_path)
+    except OSError:
+        return {}
+    doc = _load_toml(toml_path, st)
+    if doc is None:
+        return _scan_toml_section(toml_path, section, st.st_mtime_ns, st.st_size)
+    for part in section.split("."):
+        doc = doc.get(part) if isinstance(doc, dict) else None
+    return doc if isinstance(doc, dict) else {}
+
+
+def _read_toml_field(toml_path, section_prefix, key):
+    """Extract *key* from the ``[section_prefix]`` table; None if absent."""
+    val = _toml_section(toml_path, section_prefix).get(key)
+    return None if val is None else str(val)
 
 
 def _sha256_file(path):
     """Compute SHA-256 hex digest of a file."""
-    h = hashlib.sha256()
-    with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            h.update(chunk)
+    import hashlib
+
+    # Unbuffered: the read paths use their own 256 KiB buffer, so a
+    # BufferedReader would only add a copy per chunk.
+    with open(path, "rb", buffering=0) as f:
+        if hasattr(hashlib, "file_digest"):  # 3.11+: read loop runs in C
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        # Older interpreters: hash the page cache through a read-only
+        # mapping in one C call, as the upload path streams it.
+        try:
+            import mmap
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return hashlib.sha256(mm).hexdigest()
+        except (OSError, ValueError):  # empty file, or no mmap on this fs
+            pass
+        h = hashlib.sha256()
+        buf = memoryview(bytearray(1 << 18))
+        while n := f.readinto(buf):
+            h.update(buf[:n])
     return h.hexdigest()
 
 
 def _discover_wheels(wheelhouse):
     """Return sorted list of .whl file paths in the wheelhouse directory."""
-    if not os.path.isdir(wheelhouse):
+    try:
+        with os.scandir(wheelhouse) as it:
+            wheels = [e.path for e in it
+                      if e.name.endswith(".whl") and e.is_file()]
+    except (FileNotFoundError, NotADirectoryError):
         return []
-    return sorted(
-        os.path.join(wheelhouse, f)
-        for f in os.listdir(wheelhouse)
-        if f.endswith(".whl")
-    )
+    wheels.sort()
+    return wheels
+
+
+# Random per process, so no wheel's bytes can contain the delimiter.  The
+# constant framing is encoded once here rather than per field.
+_BOUNDARY = "----PPMPublishBoundary" + os.urandom(12).hex()
+_DELIMITER = f"--{_BOUNDARY}\r\n".encode("ascii")
+_CLOSE_DELIMITER = f"--{_BOUNDARY}--\r\n".encode("ascii")
+_CONTENT_TYPE = f"multipart/form-data; boundary={_BOUNDARY}"
 
 
 def _multipart_encode(fields, files):
@@ -450,39 +578,348 @@ def _multipart_encode(fields, files):
 
     Returns (body_bytes, content_type).
     """
-    boundary = "----PPMPublishBoundary"
-    parts = []
-    for key, value in fields.items():
-        parts.append(
-            f"--{boundary}\r\n"
-            f'Content-Disposition: form-data; name="{key}"\r\n\r\n'
-            f"{value}\r\n"
-        )
+    return b"".join(_multipart_segments(fields, files)), _CONTENT_TYPE
+
+
+def _form_field(key, value):
+    return _DELIMITER + (
+        f'Content-Disposition: form-data; name="{key}"\r\n\r\n'
+        f"{value}\r\n"
+    ).encode("utf-8")
+
+
+class _DigestField:
+    """Form field whose value is the SHA-256 of the files streamed before it."""
+
+    def __init__(self, name):
+        self.name = name
+        self.length = len(_form_field(name, "0" * 64))
+
+
+def _multipart_segments(fields, files, digest_field=None):
+    """Multipart/form-data body as a list of segments.
+
+    *files* maps a form key to ``(filename, data)`` where ``data`` is the
+    content as ``bytes`` or a path; a path is left in place so the body can
+    be streamed from disk.  Every other segment is a small ``bytes`` header.
+    With *digest_field*, a field of that name carrying the files' SHA-256
+    follows them; only ``_MultipartBody`` can fill it in.
+    """
+    segments = [_form_field(key, value) for key, value in fields.items()]
     for key, (filename, data) in files.items():
-        parts.append(
-            f"--{boundary}\r\n"
+        segments.append(_DELIMITER + (
             f'Content-Disposition: form-data; name="{key}"; filename="{filename}"\r\n'
             f"Content-Type: application/octet-stream\r\n\r\n"
+        ).encode("utf-8"))
+        segments.append(data)
+        segments.append(b"\r\n")
+    if digest_field:
+        segments.append(_DigestField(digest_field))
+    segments.append(_CLOSE_DELIMITER)
+    return segments
+
+
+def _readahead(f):
+    """Ask the kernel to read *f* ahead while earlier blocks are being sent.
+
+    Disk reads then overlap the socket writes of the same upload instead of
+    alternating with them.  A no-op where ``posix_fadvise`` is unavailable.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = f.fileno()
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    except OSError:
+        pass
+
+
+class _MappedFile:
+    """Sequential reader over a memory-mapped file.
+
+    ``read()`` returns ``memoryview`` slices of the mapping, so blocks go
+    from the page cache to ``hashlib`` and the socket without being copied
+    into ``bytes`` first.
+    """
+
+    def __init__(self, f):
+        import mmap
+
+        self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(self._mm, "madvise"):
+            self._mm.madvise(mmap.MADV_SEQUENTIAL)
+        self._view = memoryview(self._mm)
+        self._pos = 0
+
+    def read(self, size=-1):
+        end = len(self._view) if size < 0 else min(self._pos + size, len(self._view))
+        chunk = self._view[self._pos:end]
+        self._pos = end
+        return chunk
+
+    def close(self):
+        try:
+            self._view.release()
+            self._mm.close()
+        except BufferError:
+            pass  # a block is still being sent; unmapped once it is freed
+
+
+def _open_wheel(path):
+    """*path* as a ``_MappedFile``, or a plain file where mmap is unusable."""
+    f = open(path, "rb")
+    try:
+        mapped = _MappedFile(f)
+    except (OSError, ValueError):  # empty file, or no mmap on this fs
+        _readahead(f)
+        return f
+    f.close()  # the mapping keeps its own reference to the file
+    return mapped
+
+
+class _MultipartBody:
+    """Read-only file object over multipart segments (bytes or file paths).
+
+    ``urllib`` sends it block by block, so a wheel is never held in memory
+    as a whole; ``length`` is the exact Content-Length.  Files are mapped
+    and hashed as they stream past, so publishing reads each wheel from
+    disk once and never copies it through userspace buffers.
+    """
+
+    def __init__(self, segments):
+        import hashlib
+
+        self._segments = segments
+        self._idx = 0
+        self._cur = None
+        self._hashing = False
+        self._files_left = sum(1 for seg in segments if isinstance(seg, str))
+        self.sha256 = hashlib.sha256()
+        self.length = sum(
+            len(seg) if isinstance(seg, bytes)
+            else seg.length if isinstance(seg, _DigestField)
+            else os.path.getsize(seg)
+            for seg in segments
         )
-        parts.append(None)  # placeholder for binary data
-        parts.append("\r\n")
-    parts.append(f"--{boundary}--\r\n")
-
-    body = b""
-    file_iter = iter(files.values())
-    for part in parts:
-        if part is None:
-            _, data = next(file_iter)
-            body += data
+
+    def _open(self, seg):
+        self._hashing = isinstance(seg, str)
+        if self._hashing:
+            return _open_wheel(seg)
+        if isinstance(seg, _DigestField):
+            return io.BytesIO(_form_field(seg.name, self.sha256.hexdigest()))
+        return io.BytesIO(seg)
+
+    def read(self, size=-1):
+        out = []
+        while self._idx < len(self._segments) and size != 0:
+            if self._cur is None:
+                self._cur = self._open(self._segments[self._idx])
+            chunk = self._cur.read(size)
+            if not chunk:
+                self._cur.close()
+                self._cur = None
+                self._idx += 1
+                if self._hashing:
+                    self._files_left -= 1
+                continue
+            if self._hashing:
+                self.sha256.update(chunk)
+            out.append(chunk)
+            if size > 0:
+                size -= len(chunk)
+        if len(out) == 1:
+            return out[0]  # possibly a view of a mapped wheel; no copy
+        return b"".join(out)
+
+    def hexdigest(self):
+        """SHA-256 of the streamed files, or None until all were sent."""
+        return self.sha256.hexdigest() if self._files_left == 0 else None
+
+    def close(self):
+        if self._cur is not None:
+            self._cur.close()
+            self._cur = None
+        self._idx = len(self._segments)
+
+
+class _KeepAliveConnections:
+    """One persistent HTTP(S) connection per upload thread.
+
+    ``urlopen`` opens (and TLS-handshakes) a new connection per request;
+    these stay open across a thread's uploads.  Stdlib only.
+    """
+
+    def __init__(self, url, timeout=120):
+        import http.client
+        import threading
+        import urllib.parse
+
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme == "https":
+            import ssl
+
+            # One context for every worker: building the default context
+            # loads the system CA bundle, which would otherwise happen once
+            # per connection.
+            self._cls = functools.partial(
+                http.client.HTTPSConnection,
+                context=ssl.create_default_context())
         else:
-            body += part.encode("utf-8")
+            self._cls = http.client.HTTPConnection
+        self._netloc = parts.netloc
+        self.path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self.timeout = timeout
+        self._local = threading.local()
+        self._opened = []
+        self._lock = threading.Lock()
+
+    def _conn(self, fresh=False):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or fresh:
+            if conn is not None:
+                conn.close()
+            conn = self._cls(self._netloc, timeout=self.timeout)
+            self._local.conn = conn
+            with self._lock:
+                self._opened.append(conn)
+        return conn
+
+    def post(self, make_body, headers):
+        """POST a ``_MultipartBody`` from ``make_body()``; return
+        ``(status, response_bytes)``.
+
+        A keep-alive connection the server has since closed is detected on
+        first use and the request is sent once more on a fresh one.
+        """
+        import http.client
+
+        for attempt in (0, 1):
+            reused = getattr(self._local, "conn", None) is not None
+            conn = self._conn(fresh=attempt > 0)
+            body = make_body()
+            try:
+                conn.request("POST", self.path, body=body,
+                             headers={**headers, "Content-Length": str(body.length)})
+                resp = conn.getresponse()
+                return resp.status, resp.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError,
+                    BrokenPipeError):
+                conn.close()
+                if attempt or not reused:
+                    raise
+            finally:
+                body.close()
+
+    def close(self):
+        with self._lock:
+            for conn in self._opened:
+                conn.close()
+            self._opened.clear()
+
+
+def _upload_one(whl_path, upload_url, token, project_name, project_version,
+                conns=None):
+    """Upload one wheel; return ``(ok, [(line, is_error), ...])``.
+
+    Output is returned rather than printed so concurrent uploads do not
+    interleave their lines.  *conns* is a ``_KeepAliveConnections`` for
+    *upload_url*; without one the request goes through ``urlopen``.
+    """
+    import http.client
+    import urllib.error
+    import urllib.request
 
-    content_type = f"multipart/form-data; boundary={boundary}"
-    return body, content_type
+    filename = os.path.basename(whl_path)
+
+    fields = {
+        "name": project_name,
+        "version": project_version,
+    }
+    files = {
+        "wheel": (filename, whl_path),
+    }
+    bodies = []
+
+    def make_body():
+        # Streamed from disk and hashed on the way; the sha256 field goes
+        # after the wheel, so the file is read once and never held whole.
+        body = _MultipartBody(_multipart_segments(fields, files, "sha256"))
+        bodies.append(body)
+        return body
+
+    def result(ok, line, is_err):
+        sha256 = (bodies and bodies[-1].hexdigest()) or _sha256_file(whl_path)
+        return ok, [(f"  ⬆️  {filename} ({sha256[:12]}…) → {upload_url}", False),
+                    (line, is_err)]
+
+    headers = {
+        "Authorization": f"Bearer {token}",
+        "Content-Type": _CONTENT_TYPE,
+        "User-Agent": "ppm-cli/0.0.3",
+    }
+
+    if conns is not None:
+        try:
+            status, resp_body = conns.post(make_body, headers)
+        except (OSError, http.client.HTTPException) as exc:
+            return result(False, f"      ❌ Connection error: {exc}", True)
+        text = resp_body.decode("utf-8", errors="replace")
+        # Redirects are not followed here, so a 3xx uploaded nothing either.
+        if not 200 <= status < 300:
+            return result(False, f"      ❌ HTTP {status}: {text[:200]}", True)
+        return result(True, f"      ✅ {status} — {text[:200]}", False)
+
+    body = make_body()
+    headers["Content-Length"] = str(body.length)
+    req = urllib.request.Request(
+        upload_url,
+        data=body,
+        method="POST",
+        headers=headers,
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=120) as resp:
+            status = resp.status
+            resp_body = resp.read().decode("utf-8", errors="replace")
+        return result(True, f"      ✅ {status} — {resp_body[:200]}", False)
+    except urllib.error.HTTPError as exc:
+        err_body = exc.read().decode("utf-8", errors="replace")
+        return result(False, f"      ❌ HTTP {exc.code}: {err_body[:200]}", True)
+    except urllib.error.URLError as exc:
+        return result(False, f"      ❌ Connection error: {exc.reason}", True)
+    finally:
+        body.close()
+
+
+def _uses_proxy(url):
+    """True when urllib would route *url* through a configured proxy."""
+    import urllib.parse
+    import urllib.request
+
+    parts = urllib.parse.urlsplit(url)
+    proxies = urllib.request.getproxies()
+    return (parts.scheme in proxies
+            and not urllib.request.proxy_bypass(parts.hostname or ""))
+
+
+class _Inline:
+    """Executor stand-in that runs ``map`` lazily on the calling thread."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    map = staticmethod(map)
 
 
 def cmd_publish(args):
     """Publish wheels to the PPM registry."""
+    from concurrent.futures import ThreadPoolExecutor
+
     root = args.root
     toml_path = os.path.join(root, "PPM.toml")
 
@@ -522,53 +959,34 @@ def cmd_publish(args):
     print(f"Found {len(wheels)} wheel(s) in {wheelhouse}")
 
     upload_url = registry.rstrip("/") + "/api/v1/upload"
+    jobs = max(1, min(args.jobs, len(wheels)))
+
+    # Uploads are network-bound, so they overlap in threads; results are
+    # printed in wheel order as each one finishes.
+    # Each worker keeps its connection alive across uploads; proxied
+    # registries go through urlopen, which knows how to reach them.
     ok_count = 0
     fail_count = 0
+    conns = None if _uses_proxy(upload_url) else _KeepAliveConnections(upload_url)
 
-    for whl_path in wheels:
-        filename = os.path.basename(whl_path)
-        sha256 = _sha256_file(whl_path)
-        with open(whl_path, "rb") as f:
-            whl_data = f.read()
-
-        fields = {
-            "name": project_name,
-            "version": project_version,
-            "sha256": sha256,
-        }
-        files = {
-            "wheel": (filename, whl_data),
-        }
-
-        body, content_type = _multipart_encode(fields, files)
-
-        req = urllib.request.Request(
-            upload_url,
-            data=body,
-            method="POST",
-            headers={
-                "Authorization": f"Bearer {token}",
-                "Content-Type": content_type,
-                "User-Agent": "ppm-cli/0.0.3",
-            },
-        )
+    def upload(whl):
+        return _upload_one(whl, upload_url, token,
+                           project_name, project_version, conns)
 
-        print(f"  ⬆️  {filename} ({sha256[:12]}…) → {upload_url}")
-        try:
-            with urllib.request.urlopen(req, timeout=120) as resp:
-                status = resp.status
-                resp_body = resp.read().decode("utf-8", errors="replace")
-            print(f"      ✅ {status} — {resp_body[:200]}")
-            ok_count += 1
-        except urllib.error.HTTPError as exc:
-            err_body = exc.read().decode("utf-8", errors="replace")
-            print(f"      ❌ HTTP {exc.code}: {err_body[:200]}",
-                  file=sys.stderr)
-            fail_count += 1
-        except urllib.error.URLError as exc:
-            print(f"      ❌ Connection error: {exc.reason}",
-                  file=sys.stderr)
-            fail_count += 1
+    try:
+        # A single job gains nothing from a pool; upload inline instead
+        # of starting a worker thread.
+        with ThreadPoolExecutor(max_workers=jobs) if jobs > 1 else _Inline() as pool:
+            for ok, lines in pool.map(upload, wheels):
+                for line, is_err in lines:
+                    print(line, file=sys.stderr if is_err else sys.stdout)
+                if ok:
+                    ok_count += 1
+                else:
+                    fail_count += 1
+    finally:
+        if conns is not None:
+            conns.close()
 
     print(f"\n🏁 Published {ok_count}/{len(wheels)} wheel(s)"
           + (f" ({fail_count} failed)" if fail_count else ""))
@@ -576,64 +994,95 @@ def cmd_publish(args):
         sys.exit(1)
 
 
-def build_parser():
+# Subcommand table: name -> (handler, help, [(flags, add_argument kwargs)]).
+# Declarative so main() can build just the subparser it is about to use.
+# Shared by every plain flag; add_argument copies keyword arguments, so
+# one dict serves them all.
+_STORE_TRUE = types.MappingProxyType({"action": "store_true"})
+# Accepted but unimplemented flags, kept out of --help.
+_HIDDEN_STORE_TRUE = types.MappingProxyType({"action": "store_true", "help": argparse.SUPPRESS})
+
+_COMMANDS = {
+    "resolve": (cmd_resolve, None, []),
+    "lock": (cmd_lock, None, []),
+    "doctor": (cmd_doctor, None, [
+        (("--explain",), _STORE_TRUE),
+        (("--fail-on-red",), _STORE_TRUE),
+        (("--fix",), _HIDDEN_STORE_TRUE),
+    ]),
+    "build": (cmd_build, None, [
+        (("--wheel",), _HIDDEN_STORE_TRUE),
+        (("--out",), {"default": None}),
+    ]),
+    "install": (cmd_install, None, [
+        (("--prefer",), {"default": None, "help": argparse.SUPPRESS}),
+    ]),
+    "run": (cmd_run, None, [
+        (("script",), {}),
+    ]),
+    "publish": (cmd_publish, None, [
+        (("--registry",), {"default": None}),
+        (("--token",), {"default": None}),
+        (("--wheelhouse",), {"default": None}),
+        (("--jobs",), {"type": int, "default": 8,
+                       "help": "Concurrent uploads (default: 8)"}),
+    ]),
+    "validate-mcp": (cmd_validate_mcp, "Validate MCP Registry metadata", [
+        (("--fail-on-error",), {"action": "store_true",
+                                "help": "Exit with error if validation fails"}),
+    ]),
+    "init-mcp": (cmd_init_mcp, "Generate server.json for MCP Registry publishing", [
+        (("--force",), {"action": "store_true",
+                        "help": "Overwrite existing server.json"}),
+    ]),
+    "publish-mcp": (cmd_publish_mcp, "Publish MCP server to the MCP Registry", [
+        (("--dry-run",), {"action": "store_true",
+                          "help": "Validate and show what would be published without publishing"}),
+    ]),
+}
+
+
+def build_parser(only=None, stubs=False):
+    """The ``ppm`` parser; with *only*, just that one subcommand is added.
+
+    *stubs* registers every subcommand without its arguments, which is
+    all ``ppm --help`` and a bare ``ppm`` need to list them.
+    """
     ap = argparse.ArgumentParser(prog="ppm", description="PPM — Python Package Manager")
     ap.add_argument("--root", default=".", help="Project root directory")
 
     sub = ap.add_subparsers(dest="cmd")
 
-    sub.add_parser("resolve").set_defaults(func=cmd_resolve)
-    sub.add_parser("lock").set_defaults(func=cmd_lock)
-
-    p = sub.add_parser("doctor")
-    p.add_argument("--explain", action="store_true")
-    p.add_argument("--fail-on-red", action="store_true")
-    p.add_argument("--fix", action="store_true")
-    p.set_defaults(func=cmd_doctor)
-
-    p = sub.add_parser("build")
-    p.add_argument("--wheel", action="store_true")
-    p.add_argument("--out", default=None)
-    p.set_defaults(func=cmd_build)
-
-    p = sub.add_parser("install")
-    p.add_argument("--prefer", default=None)
-    p.set_defaults(func=cmd_install)
-
-    p = sub.add_parser("run")
-    p.add_argument("script")
-    p.set_defaults(func=cmd_run)
-
-    p = sub.add_parser("publish")
-    p.add_argument("--registry", default=None)
-    p.add_argument("--token", default=None)
-    p.add_argument("--wheelhouse", default=None)
-    p.set_defaults(func=cmd_publish)
-
-    p = sub.add_parser("validate-mcp",
-                        help="Validate MCP Registry metadata")
-    p.add_argument("--fail-on-error", action="store_true",
-                   help="Exit with error if validation fails")
-    p.set_defaults(func=cmd_validate_mcp)
-
-    p = sub.add_parser("init-mcp",
-                        help="Generate server.json for MCP Registry publishing")
-    p.add_argument("--force", action="store_true",
-                   help="Overwrite existing server.json")
-    p.set_defaults(func=cmd_init_mcp)
-
-    p = sub.add_parser("publish-mcp",
-                        help="Publish MCP server to the MCP Registry")
-    p.add_argument("--dry-run", action="store_true",
-                   help="Validate and show what would be published without publishing")
-    p.set_defaults(func=cmd_publish_mcp)
+    for name, (func, help_text, arguments) in _COMMANDS.items():
+        if only is not None and name != only:
+            continue
+        p = sub.add_parser(name, **({"help": help_text} if help_text else {}))
+        p.set_defaults(func=func)
+        if stubs:
+            continue
+        for flags, kwargs in arguments:
+            p.add_argument(*flags, **kwargs)
 
     return ap
 
 
+def _command_in(argv):
+    """The subcommand named in *argv*, or None (skips ``--root VALUE``)."""
+    tokens = iter(argv)
+    for tok in tokens:
+        if tok == "--root":
+            next(tokens, None)
+        elif not tok.startswith("-"):
+            return tok if tok in _COMMANDS else None
+    return None
+
+
 def main(argv=None):
     argv = argv or sys.argv[1:]
-    parser = build_parser()
+    # Known subcommand: skip building the other subparsers.  Otherwise
+    # argparse only has to list or reject commands, so stubs suffice.
+    cmd = _command_in(argv)
+    parser = build_parser(only=cmd, stubs=cmd is None)
     args = parser.parse_args(argv)
     if not args.cmd:
         parser.print_help()
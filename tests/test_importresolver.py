@@ -0,0 +1,786 @@
+"""
+Tests for the Resolver-lib import resolver — URL helpers, version
+selection, lock-file output, dependency ordering and artifact downloads.
+"""
+import hashlib
+import os
+import posixpath
+import sys
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+
+import pytest
+from packaging.version import Version
+
+# Resolver-lib is not a package; import the module from its directory.
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "Resolver-lib"))
+
+import Importresolver as ir  # noqa: E402
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _resolver(tmp_path, retries=1):
+    return ir.Resolver(
+        root=str(tmp_path), index_url="http://127.0.0.1:1/simple",
+        extra_indexes=[], timeout=5, retries=retries, user_agent="ppm-test",
+        strict_hash=False, follow_transitives=False,
+        index_cache_dir=str(tmp_path / "simple"), requires_cache=None,
+    )
+
+
+_WHEEL = b"wheel-bytes" * 100
+
+
+class _DownloadHandler(BaseHTTPRequestHandler):
+    """GET /fail answers 503; GET /truncate breaks off the first body."""
+    hits = []
+
+    def do_GET(self):
+        _DownloadHandler.hits.append(self.path)
+        if self.path.startswith("/fail"):
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = _WHEEL
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.path.startswith("/truncate") and len(_DownloadHandler.hits) == 1:
+            body = body[:10]  # short body, then the connection closes
+        self.wfile.write(body)
+        self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+# ---------------------------------------------------------------------------
+# URL and version helpers
+# ---------------------------------------------------------------------------
+
+class TestBasenameFromUrl:
+    @pytest.mark.parametrize("url, expected", [
+        ("https://files.example/p/pkg-1.0-py3-none-any.whl", "pkg-1.0-py3-none-any.whl"),
+        ("https://files.example/pkg-1.0.tar.gz?x=1&y=/a/b", "pkg-1.0.tar.gz"),
+        ("https://files.example/pkg-1.0.whl#sha256=abc/def", "pkg-1.0.whl"),
+        ("https://files.example/pkg-1.0.whl?q=1#frag", "pkg-1.0.whl"),
+        # Percent escapes are kept, so an encoded "/" cannot leave the cache dir.
+        ("https://files.example/caf%C3%A9-1.0.whl", "caf%C3%A9-1.0.whl"),
+        ("https://files.example/a%2F..%2Fb.whl", "a%2F..%2Fb.whl"),
+        ("https://files.example/simple/", ""),
+    ])
+    def test_last_segment(self, url, expected):
+        assert ir._basename_from_url(url) == expected
+        assert ir._basename_from_url(url) == posixpath.basename(urlsplit(url).path)
+
+
+class TestBestVersion:
+    def _best(self, spec, versions):
+        best = ir.best_version(ir._requirement(spec), map(Version, versions))
+        return str(best) if best is not None else None
+
+    def test_highest_matching_stable(self):
+        assert self._best("pkg>=1.0,<2", ["0.9", "1.0", "1.5", "2.0"]) == "1.5"
+        assert self._best("pkg", ["1.0", "3.1", "2.0"]) == "3.1"
+
+    def test_prerelease_only_without_stable(self):
+        assert self._best("pkg", ["1.0", "2.0b1"]) == "1.0"
+        assert self._best("pkg>=1.5", ["1.0", "2.0b1", "2.0rc1"]) == "2.0rc1"
+
+    def test_explicit_prerelease_spec(self):
+        assert self._best("pkg>=2.0b1", ["1.0", "2.0b1"]) == "2.0b1"
+
+    def test_no_match(self):
+        assert self._best("pkg>5", ["1.0", "2.0"]) is None
+        assert self._best("pkg", []) is None
+
+
+class TestSdistVersionGuess:
+    @pytest.mark.parametrize("filename, name_key, expected", [
+        ("requests-2.31.0.tar.gz", "requests", "2.31.0"),
+        ("zope.interface-6.0.zip", "zope-interface", "6.0"),
+        ("my-cool_pkg-1.2.3.tar.bz2", "my-cool-pkg", "1.2.3"),
+        ("Django-4.2.tar.xz", "django", "4.2"),
+        ("pkg-1.0.whl", "pkg", None),
+        ("pkg.tar.gz", "pkg", None),
+    ])
+    def test_guess(self, filename, name_key, expected):
+        assert ir.sdist_version_guess(filename, name_key) == expected
+
+
+class TestTopologicalOrder:
+    def _order(self, tmp_path, edges):
+        res = _resolver(tmp_path)
+        for name in edges:
+            res.resolved[name] = ir.PackageLock(name=name, version="1.0",
+                                                markers=None, artifacts=[])
+        res.edges = {n: list(ds) for n, ds in edges.items()}
+        return res.topological_order()
+
+    def test_dependencies_first(self, tmp_path):
+        order = self._order(tmp_path, {
+            "app": ["web", "db"], "web": ["util"], "db": ["util"], "util": [],
+        })
+        assert order[0] == "util" and order[-1] == "app"
+        for name, deps in (("app", ["web", "db"]), ("web", ["util"]), ("db", ["util"])):
+            assert all(order.index(d) < order.index(name) for d in deps)
+
+    def test_unresolved_and_self_edges_ignored(self, tmp_path):
+        assert self._order(tmp_path, {"a": ["a", "missing"], "b": ["a"]}) == ["a", "b"]
+
+    def test_cycles_appended_last(self, tmp_path):
+        order = self._order(tmp_path, {"x": ["y"], "y": ["x"], "leaf": []})
+        assert order == ["leaf", "x", "y"]
+
+
+# ---------------------------------------------------------------------------
+# Simple-page parsing
+# ---------------------------------------------------------------------------
+
+_INDEX = "https://index.example/simple/foo/"
+
+_SIMPLE_PAGES = [
+    '<a href="foo-1.0.tar.gz">foo-1.0.tar.gz</a>',
+    '<a data-requires-python=">=3.7" href="foo-1.0.tar.gz">foo-1.0.tar.gz</a>',
+    "<a href='foo-1.0.tar.gz' data-requires-python='&gt;=3.7'>foo-1.0.tar.gz</a>",
+    '<a href="/f/foo-1.0-py3-none-any.whl#sha256=' + "AB" * 32 + '"'
+    ' data-dist-info-metadata="sha256=' + "cd" * 32 + '">foo-1.0-py3-none-any.whl</a>',
+    '<a href="../../f/foo-2.0.zip#md5=x&amp;sha256=' + "ef" * 32 + '"'
+    ' data-core-metadata="false">foo-2.0.zip</a>',
+    '<A HREF="foo-3.0.tar.gz" data-core-metadata>foo-3.0.tar.gz</A>',
+    '<abbr>x</abbr><a>no href</a><a href="">empty</a>'
+    '<a href="foo-4.0.tar.gz" data-x=a>b>foo-4.0.tar.gz</a>',
+]
+
+
+def _html_parser_listing(text):
+    p = ir._SimpleLinkParser(_INDEX)
+    p.feed(text)
+    p.close()
+    return p.out
+
+
+class TestSimpleLinkParser:
+    def test_hash_fragment_variants(self):
+        digest = "AB" * 32
+        out = _html_parser_listing(
+            f'<a href="a.whl#sha256={digest}">a.whl</a>'
+            f'<a href="b.whl#md5=00&amp;sha256={digest}&amp;x=1">b.whl</a>'
+            f'<a href="c.whl#sha256={digest[:-2]}">c.whl</a>'  # too short
+            f'<a href="d.whl#sha512=ff">d.whl</a>'
+            '<a href="e.whl">e.whl</a>'
+        )
+        assert [sha for _, _, sha, _ in out] == ["ab" * 32, "ab" * 32, None, None, None]
+
+    @pytest.mark.parametrize("attr, has_meta", [
+        ('data-core-metadata="true"', True),
+        ('data-core-metadata="sha256=' + "cd" * 32 + '"', True),
+        ("data-dist-info-metadata", False),  # bare attribute: no value, as if absent
+        ("DATA-DIST-INFO-METADATA='true'", True),  # names are case-insensitive
+        ('data-core-metadata="false"', False),
+        ('data-core-metadata="FALSE" data-dist-info-metadata="true"', False),
+        ("", False),
+    ])
+    def test_metadata_attribute_variants(self, attr, has_meta):
+        out = _html_parser_listing(
+            f'<a href="foo-1.0-py3-none-any.whl#sha256={"ab" * 32}" {attr}>'
+            "foo-1.0-py3-none-any.whl</a>")
+        expected = _INDEX + "foo-1.0-py3-none-any.whl.metadata" if has_meta else None
+        assert out[0][3] == expected
+
+    def test_relative_hrefs_and_text(self):
+        out = _html_parser_listing(
+            '<a href="foo-1.0.tar.gz">  foo-1.0.tar.gz\n</a>'
+            '<a href="../../packages/ab/foo-1.1.tar.gz">foo-1.1.tar.gz</a>'
+            '<a href="/packages/foo-1.2.tar.gz">foo&#45;1.2.tar.gz</a>'
+            '<a href="https://cdn.example/foo-1.3.tar.gz">foo-1.3.tar.gz</a>'
+            '<a name="anchor">not a file</a><a href="">empty</a>'
+        )
+        assert [(href, name) for href, name, _, _ in out] == [
+            (_INDEX + "foo-1.0.tar.gz", "foo-1.0.tar.gz"),
+            ("https://index.example/packages/ab/foo-1.1.tar.gz", "foo-1.1.tar.gz"),
+            ("https://index.example/packages/foo-1.2.tar.gz", "foo-1.2.tar.gz"),
+            ("https://cdn.example/foo-1.3.tar.gz", "foo-1.3.tar.gz"),
+        ]
+
+
+@pytest.fixture
+def fast_parse():
+    try:
+        from resolver_fast import parse_simple_html
+    except ImportError:
+        pytest.skip("resolver_fast extension not built")
+    return parse_simple_html
+
+
+class TestFastSimpleParser:
+    @pytest.mark.parametrize("page", _SIMPLE_PAGES)
+    def test_matches_html_parser(self, fast_parse, page):
+        html = f"<html><body>{page}<br/>\n</body></html>"
+        assert fast_parse(_INDEX, html) == _html_parser_listing(html)
+
+    def test_quoted_gt_in_attribute(self, fast_parse):
+        out = fast_parse(_INDEX, _SIMPLE_PAGES[1])
+        assert [(href, name) for href, name, _, _ in out] == [
+            (_INDEX + "foo-1.0.tar.gz", "foo-1.0.tar.gz")]
+
+
+class TestParseSimpleJson:
+    def _files(self, *files):
+        return ir.parse_simple_json(_INDEX, {"meta": {"api-version": "1.1"}, "files": list(files)})
+
+    def test_hashes_lowercased_and_optional(self):
+        out = self._files(
+            {"filename": "foo-1.0.tar.gz", "url": "foo-1.0.tar.gz",
+             "hashes": {"sha256": "AB" * 32, "md5": "x"}},
+            {"filename": "foo-1.1.tar.gz", "url": "foo-1.1.tar.gz", "hashes": {"md5": "x"}},
+            {"filename": "foo-1.2.tar.gz", "url": "foo-1.2.tar.gz"},
+        )
+        assert [sha for _, _, sha, _ in out] == ["ab" * 32, None, None]
+
+    def test_relative_and_absolute_urls(self):
+        out = self._files(
+            {"filename": "a.whl", "url": "a.whl", "hashes": {}},
+            {"filename": "b.whl", "url": "../../files/b.whl", "hashes": {}},
+            {"filename": "c.whl", "url": "/files/c.whl", "hashes": {}},
+            {"filename": "d.whl", "url": "https://cdn.example/d.whl", "hashes": {}},
+        )
+        assert [href for href, _, _, _ in out] == [
+            _INDEX + "a.whl",
+            "https://index.example/files/b.whl",
+            "https://index.example/files/c.whl",
+            "https://cdn.example/d.whl",
+        ]
+
+    @pytest.mark.parametrize("flags, has_meta", [
+        ({"core-metadata": True}, True),
+        ({"core-metadata": {"sha256": "cd" * 32}}, True),
+        ({"dist-info-metadata": True}, True),
+        ({"core-metadata": False, "dist-info-metadata": True}, False),  # new key wins
+        ({"core-metadata": False}, False),
+        ({}, False),
+    ])
+    def test_metadata_flags(self, flags, has_meta):
+        entry = {"filename": "foo-1.0-py3-none-any.whl",
+                 "url": "foo-1.0-py3-none-any.whl#sha256=" + "ab" * 32, "hashes": {}}
+        (_, _, _, meta), = self._files(dict(entry, **flags))
+        expected = _INDEX + "foo-1.0-py3-none-any.whl.metadata" if has_meta else None
+        assert meta == expected  # fragment dropped before ".metadata"
+
+    def test_yanked_entries_are_listed(self):
+        # Yank status is not part of a listing entry; version selection sees
+        # yanked files like any other.
+        out = self._files(
+            {"filename": "foo-1.0.tar.gz", "url": "foo-1.0.tar.gz", "hashes": {},
+             "yanked": "broken build"},
+            {"filename": "foo-1.1.tar.gz", "url": "foo-1.1.tar.gz", "hashes": {},
+             "yanked": False},
+        )
+        assert [name for _, name, _, _ in out] == ["foo-1.0.tar.gz", "foo-1.1.tar.gz"]
+
+    def test_empty_project(self):
+        assert ir.parse_simple_json(_INDEX, {"meta": {}, "files": []}) == []
+        assert ir.parse_simple_json(_INDEX, {}) == []
+
+
+class _IndexHandler(BaseHTTPRequestHandler):
+    """A Simple page whose ETag and body the test sets; answers 304 on a match."""
+    etag = "v1"
+    page = '<a href="foo-1.0.tar.gz">foo-1.0.tar.gz</a>'
+    seen = []
+
+    def do_GET(self):
+        validator = self.headers.get("If-None-Match")
+        _IndexHandler.seen.append(validator)
+        if validator == _IndexHandler.etag:
+            self.send_response(304)
+            self.send_header("ETag", _IndexHandler.etag)
+            self.end_headers()
+            return
+        body = _IndexHandler.page.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("ETag", _IndexHandler.etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestListingCache:
+    @pytest.fixture(scope="class", autouse=True)
+    @classmethod
+    def server(cls):
+        server = HTTPServer(("127.0.0.1", 0), _IndexHandler)
+        cls.url = f"http://127.0.0.1:{server.server_address[1]}/simple/foo/"
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        yield
+        server.shutdown()
+        server.server_close()
+
+    @pytest.fixture(autouse=True)
+    def reset_page(self, monkeypatch):
+        monkeypatch.setattr(_IndexHandler, "etag", "v1")
+        monkeypatch.setattr(_IndexHandler, "page", '<a href="foo-1.0.tar.gz">foo-1.0.tar.gz</a>')
+        _IndexHandler.seen.clear()
+
+    def _fetch(self, cache_dir):
+        session = ir.request_session(5, 0, "ppm-test")
+        return ir.fetch_simple_listing(session, self.url, cache_dir=str(cache_dir))
+
+    def _names(self, listing):
+        return [name for _, name, _, _ in listing]
+
+    def test_304_reuses_cached_listing(self, tmp_path):
+        assert self._names(self._fetch(tmp_path)) == ["foo-1.0.tar.gz"]
+        # Same ETag: the server's new body is never sent, the cache is used.
+        _IndexHandler.page = '<a href="foo-9.0.tar.gz">foo-9.0.tar.gz</a>'
+        assert self._names(self._fetch(tmp_path)) == ["foo-1.0.tar.gz"]
+        assert _IndexHandler.seen == [None, "v1"]
+
+    def test_new_etag_rewrites_cache(self, tmp_path):
+        import json
+        self._fetch(tmp_path)
+        _IndexHandler.etag = "v2"
+        _IndexHandler.page = '<a href="foo-2.0.tar.gz">foo-2.0.tar.gz</a>'
+        assert self._names(self._fetch(tmp_path)) == ["foo-2.0.tar.gz"]
+        with open(ir._listing_cache_path(str(tmp_path), self.url), encoding="utf-8") as f:
+            cached = json.load(f)
+        assert cached["etag"] == "v2"
+        assert [e[1] for e in cached["listing"]] == ["foo-2.0.tar.gz"]
+        # ...and the next request revalidates against the new ETag.
+        assert self._names(self._fetch(tmp_path)) == ["foo-2.0.tar.gz"]
+        assert _IndexHandler.seen == [None, "v1", "v2"]
+
+
+# ---------------------------------------------------------------------------
+# Digest sidecars
+# ---------------------------------------------------------------------------
+
+class TestCachedSha256:
+    @pytest.fixture
+    def hashed(self, monkeypatch):
+        """Paths actually re-hashed by sha256_file (sidecar misses)."""
+        calls = []
+        real = ir.sha256_file
+
+        def counting(path, *args):
+            calls.append(path)
+            return real(path, *args)
+
+        monkeypatch.setattr(ir, "sha256_file", counting)
+        return calls
+
+    def _artifact(self, tmp_path, data=b"wheel"):
+        path = tmp_path / "pkg-1.0-py3-none-any.whl"
+        path.write_bytes(data)
+        return str(path)
+
+    def test_sidecar_reused_while_unchanged(self, tmp_path, hashed):
+        path = self._artifact(tmp_path)
+        expected = hashlib.sha256(b"wheel").hexdigest()
+        assert ir.cached_sha256(path) == expected
+        assert os.path.exists(path + ".sha256")
+        assert ir.cached_sha256(path) == expected
+        assert ir.cached_sha256(path, os.stat(path)) == expected
+        assert hashed == [path]
+
+    def test_size_change_recomputes(self, tmp_path, hashed):
+        path = self._artifact(tmp_path)
+        st = os.stat(path)
+        ir.cached_sha256(path)
+        with open(path, "wb") as f:
+            f.write(b"wheel, rebuilt")
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))  # same mtime, new size
+        assert ir.cached_sha256(path) == hashlib.sha256(b"wheel, rebuilt").hexdigest()
+        assert len(hashed) == 2
+
+    def test_mtime_change_recomputes(self, tmp_path, hashed):
+        path = self._artifact(tmp_path)
+        ir.cached_sha256(path)
+        with open(path, "wb") as f:
+            f.write(b"WHEEL")  # same size
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        assert ir.cached_sha256(path) == hashlib.sha256(b"WHEEL").hexdigest()
+        assert len(hashed) == 2
+        assert ir.cached_sha256(path) == hashlib.sha256(b"WHEEL").hexdigest()
+        assert len(hashed) == 2  # rewritten sidecar is valid again
+
+
+    @pytest.mark.parametrize("sidecar", [
+        b"",
+        b"garbage",
+        b"abc123 5 1",  # short digest
+        b"zz" * 32 + b" {stamp}",  # not hex
+        b"\xff\xfe\x00 not utf-8",
+        b"ab" * 32,  # no stamp
+    ])
+    def test_corrupt_sidecar_recomputes(self, tmp_path, hashed, sidecar):
+        path = self._artifact(tmp_path)
+        stamp = ir._digest_stamp(path).encode()
+        with open(path + ".sha256", "wb") as f:
+            f.write(sidecar.replace(b"{stamp}", stamp))
+        assert ir.cached_sha256(path) == hashlib.sha256(b"wheel").hexdigest()
+        assert hashed == [path]
+        assert ir.cached_sha256(path) == hashlib.sha256(b"wheel").hexdigest()
+        assert hashed == [path]  # repaired sidecar reused
+
+    def test_stale_sidecar_with_matching_stamp_needs_verify(self, tmp_path, hashed):
+        path = self._artifact(tmp_path)
+        with open(path + ".sha256", "w", encoding="utf-8") as f:
+            f.write(f"{'00' * 32} {ir._digest_stamp(path)}\n")
+        assert ir.cached_sha256(path) == "00" * 32  # stamp matches: trusted
+        assert ir.cached_sha256(path, verify=True) == hashlib.sha256(b"wheel").hexdigest()
+        assert ir.cached_sha256(path) == hashlib.sha256(b"wheel").hexdigest()
+
+
+class TestRequiresCache:
+    def test_entries_persist_across_instances(self, tmp_path):
+        path = str(tmp_path / "sub" / "requires.json")
+        cache = ir.RequiresCache(path)
+        cache.put("AB" * 32, ["requests>=2"])
+        assert cache.get("ab" * 32) == ["requests>=2"]  # digests are case-folded
+        cache.save()
+        assert ir.RequiresCache(path).get("AB" * 32) == ["requests>=2"]
+        assert ir.RequiresCache(path).get("cd" * 32) is None
+
+    def test_save_writes_only_when_dirty(self, tmp_path, monkeypatch):
+        writes = []
+        real = ir.atomic_write
+        monkeypatch.setattr(ir, "atomic_write",
+                            lambda p, data: (writes.append(p), real(p, data)))
+        path = str(tmp_path / "requires.json")
+        cache = ir.RequiresCache(path)
+        cache.save()  # nothing loaded or added
+        cache.get("ab" * 32)
+        cache.save()  # loaded, still clean
+        assert writes == []
+        cache.put("ab" * 32, [])
+        cache.save()
+        cache.save()
+        assert writes == [path]
+
+    @pytest.mark.parametrize("content", [b"{not json", b"\xff\xfe", b"[1, 2]", b"null"])
+    def test_corrupt_file_is_tolerated(self, tmp_path, content):
+        path = tmp_path / "requires.json"
+        path.write_bytes(content)
+        cache = ir.RequiresCache(str(path))
+        assert cache.get("ab" * 32) is None
+        cache.put("ab" * 32, ["idna"])
+        cache.save()
+        assert ir.RequiresCache(str(path)).get("ab" * 32) == ["idna"]
+
+    def test_without_path_is_a_no_op(self):
+        cache = ir.RequiresCache(None)
+        cache.put("ab" * 32, ["idna"])
+        assert cache.get("ab" * 32) is None
+        cache.save()
+
+
+# ---------------------------------------------------------------------------
+# Downloads
+# ---------------------------------------------------------------------------
+
+class TestDownload:
+    @pytest.fixture(scope="class", autouse=True)
+    @classmethod
+    def server(cls):
+        server = HTTPServer(("127.0.0.1", 0), _DownloadHandler)
+        cls.base = f"http://127.0.0.1:{server.server_address[1]}"
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        yield
+        server.shutdown()
+        server.server_close()
+
+    @pytest.fixture(autouse=True)
+    def reset_hits(self):
+        _DownloadHandler.hits.clear()
+
+    def test_error_status_retried_by_adapter_only(self, tmp_path):
+        """A 503 costs retries + 1 GETs, not (retries + 1) ** 2."""
+        res = _resolver(tmp_path, retries=1)
+        with pytest.raises(Exception):
+            res._download(f"{self.base}/fail/pkg-1.0-py3-none-any.whl")
+        assert len(_DownloadHandler.hits) == 2
+
+    def test_truncated_body_is_fetched_again(self, tmp_path):
+        res = _resolver(tmp_path, retries=1)
+        local, digest = res._download(f"{self.base}/truncate/pkg-1.0-py3-none-any.whl")
+        assert len(_DownloadHandler.hits) == 2
+        assert digest == hashlib.sha256(_WHEEL).hexdigest()
+        with open(local, "rb") as f:
+            assert f.read() == _WHEEL
+        assert not os.path.exists(local + ".part")
+
+
+# ---------------------------------------------------------------------------
+# Remote wheel metadata (HTTP Range and PEP 658)
+# ---------------------------------------------------------------------------
+
+def _make_wheel(requires, padding=0):
+    """Bytes of a minimal wheel whose METADATA lists *requires*."""
+    import io
+    import zipfile
+    meta = "Metadata-Version: 2.1\nName: pkg\nVersion: 1.0\n"
+    meta += "".join(f"Requires-Dist: {r}\n" for r in requires) + "\nLong description.\n"
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        # Incompressible, stored first: the tail window must not cover it.
+        zf.writestr("pkg/blob.bin", os.urandom(padding))
+        zf.writestr("pkg-1.0.dist-info/METADATA", meta)
+    return buf.getvalue()
+
+
+_RANGE_WHEEL = _make_wheel(["requests>=2", "idna; python_version < '3'"], padding=256 * 1024)
+_METADATA = b"Metadata-Version: 2.1\nName: pkg\nVersion: 1.0\nRequires-Dist: sidecar-dep\n\n"
+
+
+class _WheelHandler(BaseHTTPRequestHandler):
+    """/range/* honours Range, /norange/* ignores it, *.metadata is a sidecar."""
+    protocol_version = "HTTP/1.1"
+    hits = []
+
+    def do_GET(self):
+        rng = self.headers.get("Range")
+        _WheelHandler.hits.append((self.path, rng))
+        if self.path.endswith(".metadata"):
+            return self._send(200, _METADATA)
+        body, size = _RANGE_WHEEL, len(_RANGE_WHEEL)
+        if self.path.startswith("/range/") and rng:
+            first, _, last = rng[len("bytes="):].partition("-")
+            if not first:  # suffix range: the last N bytes
+                start, stop = max(0, size - int(last)), size - 1
+            else:
+                start, stop = int(first), min(size - 1, int(last))
+            return self._send(206, body[start:stop + 1],
+                              {"Content-Range": f"bytes {start}-{stop}/{size}"})
+        self._send(200, body)
+
+    def _send(self, status, body, headers=()):
+        self.send_response(status)
+        for key, value in dict(headers).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestRemoteRequires:
+    @pytest.fixture(scope="class", autouse=True)
+    @classmethod
+    def server(cls):
+        server = HTTPServer(("127.0.0.1", 0), _WheelHandler)
+        cls.base = f"http://127.0.0.1:{server.server_address[1]}"
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        yield
+        server.shutdown()
+        server.server_close()
+
+    @pytest.fixture(autouse=True)
+    def reset_hits(self):
+        _WheelHandler.hits.clear()
+
+    def _artifact(self, prefix, metadata_url=None):
+        return ir.Artifact(
+            filename="pkg-1.0-py3-none-any.whl",
+            url=f"{self.base}/{prefix}/pkg-1.0-py3-none-any.whl",
+            sha256=hashlib.sha256(_RANGE_WHEEL).hexdigest(), version="1.0",
+            py_tag="py3", abi_tag="none", plat_tag="any", is_wheel=True,
+            metadata_url=metadata_url,
+        )
+
+    def test_range_file_reads_only_the_needed_bytes(self, tmp_path):
+        res = _resolver(tmp_path)
+        art = self._artifact("range")
+        assert res._remote_requires(art) == ["requests>=2", "idna; python_version < '3'"]
+        assert all(rng for _, rng in _WheelHandler.hits)
+        fetched = 0
+        for _, rng in _WheelHandler.hits:
+            first, _, last = rng[len("bytes="):].partition("-")
+            fetched += int(last) if not first else int(last) - int(first) + 1
+        assert fetched < len(_RANGE_WHEEL) // 2
+
+    def test_range_file_seek_and_read(self, tmp_path):
+        res = _resolver(tmp_path)
+        f = ir.HTTPRangeFile(res.session, f"{self.base}/range/x.whl", block=1024)
+        assert f.size == len(_RANGE_WHEEL)
+        f.seek(100)
+        assert f.read(50) == _RANGE_WHEEL[100:150]
+        f.seek(-10, os.SEEK_END)
+        assert f.read() == _RANGE_WHEEL[-10:]
+
+    def test_ignored_range_raises_and_falls_back_to_download(self, tmp_path):
+        res = _resolver(tmp_path)
+        res.follow_transitives = True
+        art = self._artifact("norange")
+        with pytest.raises(OSError):
+            ir.HTTPRangeFile(res.session, art.url)
+        assert res._remote_requires(art) is None
+
+        pkl = ir.PackageLock(name="pkg", version="1.0", markers=None, artifacts=[art])
+        specs = res._requires_of(ir._requirement("pkg"), pkl)
+        assert specs == ["requests>=2", "idna; python_version < '3'"]
+        assert os.path.exists(os.path.join(res.cache_dir, art.filename))
+
+    def test_pep658_metadata_sidecar_preferred(self, tmp_path):
+        res = _resolver(tmp_path)
+        art = self._artifact("range", metadata_url=f"{self.base}/range/pkg.whl.metadata")
+        assert res._remote_requires(art) == ["sidecar-dep"]
+        assert [path for path, _ in _WheelHandler.hits] == ["/range/pkg.whl.metadata"]
+
+
+# ---------------------------------------------------------------------------
+# Lock-file output
+# ---------------------------------------------------------------------------
+
+class TestLockJson:
+    def _pkgs(self):
+        art = ir.Artifact(
+            filename="café-1.0-py3-none-any.whl",
+            url="https://files.example/caf%C3%A9-1.0-py3-none-any.whl",
+            sha256="ab" * 32, version="1.0", py_tag="py3", abi_tag="none",
+            plat_tag="any", is_wheel=True,
+        )
+        return [
+            ir.PackageLock(name="café", version="1.0",
+                           markers='python_version >= "3.8"', artifacts=[art]),
+            ir.PackageLock(name="empty", version="2.0", markers=None, artifacts=[]),
+        ]
+
+    def test_same_bytes_with_and_without_orjson(self, tmp_path, monkeypatch):
+        if ir.orjson is None:
+            pytest.skip("orjson not installed")
+        fast, slow = str(tmp_path / "fast.json"), str(tmp_path / "slow.json")
+        indexes = {"primary": "https://pypi.org/simple"}
+        ir.write_lock_json(fast, self._pkgs(), indexes)
+        monkeypatch.setattr(ir, "orjson", None)
+        ir.write_lock_json(slow, self._pkgs(), indexes)
+        with open(fast, "rb") as f1, open(slow, "rb") as f2:
+            data = f1.read()
+            assert data == f2.read()
+        assert data.endswith(b"}\n")
+        assert "café".encode("utf-8") in data
+
+
+class TestVerifierScript:
+    def _project(self, tmp_path):
+        root = tmp_path / "proj"
+        cache = root / ".ppm" / "cache"
+        cache.mkdir(parents=True)
+        (cache / "pkg-1.0.tar.gz").write_bytes(b"sdist")
+        art = ir.Artifact(
+            filename="pkg-1.0.tar.gz", url="https://files.example/pkg-1.0.tar.gz",
+            sha256=hashlib.sha256(b"sdist").hexdigest(), version="1.0",
+            py_tag=None, abi_tag=None, plat_tag=None, is_wheel=False,
+        )
+        lock = str(root / ".ppm" / "lock.json")
+        ir.write_lock_json(lock, [ir.PackageLock(name="pkg", version="1.0",
+                                                 markers=None, artifacts=[art])], {})
+        ir.write_verifier(str(root / "resolver.py"))
+        return root, lock
+
+    def _run(self, root, cwd):
+        import subprocess
+        return subprocess.run([sys.executable, str(root / "resolver.py")], cwd=str(cwd),
+                              capture_output=True, text=True)
+
+    def test_passes_from_any_cwd_then_fails_on_tampered_lock(self, tmp_path):
+        root, lock = self._project(tmp_path)
+        elsewhere = tmp_path / "elsewhere"
+        elsewhere.mkdir()
+
+        result = self._run(root, elsewhere)
+        assert result.returncode == 0, result.stdout + result.stderr
+        assert "[ok] lock verified" in result.stdout
+
+        with open(lock, "r", encoding="utf-8") as f:
+            text = f.read()
+        with open(lock, "w", encoding="utf-8") as f:
+            f.write(text.replace(hashlib.sha256(b"sdist").hexdigest(), "0" * 64))
+        result = self._run(root, elsewhere)
+        assert result.returncode == 2
+        assert "hash mismatch for pkg-1.0.tar.gz" in result.stdout
+
+
+# ---------------------------------------------------------------------------
+# In-process transitive cache
+# ---------------------------------------------------------------------------
+
+def _offline_resolver(tmp_path, monkeypatch, requires=None):
+    """A resolver that locks any name at 1.0 (else 2.0) without the network.
+
+    *requires* maps a name to the dependency specs its metadata would list.
+    """
+    res = _resolver(tmp_path)
+    requires = requires or {}
+
+    def resolve_one(req):
+        if req.name in res.resolved:
+            return None  # first requirement seen for a name wins, as in Resolver
+        version = "1.0" if req.specifier.contains("1.0") else "2.0"
+        art = ir.Artifact(
+            filename=f"{req.name}-{version}-py3-none-any.whl", url="https://files.example/x",
+            sha256="", version=version, py_tag="py3", abi_tag="none",
+            plat_tag="any", is_wheel=True,
+        )
+        pkl = ir.PackageLock(name=req.name, version=version, markers=None, artifacts=[art])
+        res.resolved[req.name] = pkl
+        return pkl
+
+    monkeypatch.setattr(res, "_prefetch_listings", lambda wave, pool: None)
+    monkeypatch.setattr(res, "_resolve_one", resolve_one)
+    monkeypatch.setattr(res, "_requires_of", lambda req, pkl: requires.get(pkl.name, []))
+    return res
+
+
+class TestTransitiveCache:
+    @pytest.fixture(autouse=True)
+    def empty_cache(self, monkeypatch):
+        monkeypatch.setattr(ir, "TRANSITIVE_CACHE", {})
+
+    def test_hits_are_private_copies(self, tmp_path, monkeypatch):
+        first = _offline_resolver(tmp_path, monkeypatch)
+        first.resolve_graph(["demo"])
+        first.resolved["demo"].artifacts[0].sha256 = "filled-in"
+
+        # Served from the cache: a plain resolver would need the network.
+        second = _resolver(tmp_path)
+        second.resolve_graph(["demo"])
+        art = second.resolved["demo"].artifacts[0]
+        assert art.sha256 == ""
+        art.metadata_url = "changed"
+
+        third = _resolver(tmp_path)
+        third.resolve_graph(["demo"])
+        assert third.resolved["demo"].artifacts[0].metadata_url is None
+
+    def test_cache_is_bounded(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(ir, "TRANSITIVE_CACHE_MAX", 2)
+        res = _offline_resolver(tmp_path, monkeypatch)
+        res.resolve_graph(["a", "b", "c"])
+        assert len(ir.TRANSITIVE_CACHE) == 2
+        assert [key[2] for key in ir.TRANSITIVE_CACHE] == [
+            ir.requirement_key(ir._requirement(n)) for n in ("b", "c")]
+
+    def test_sibling_constraints_are_part_of_the_key(self, tmp_path, monkeypatch):
+        requires = {"app": ["lib"]}
+        first = _offline_resolver(tmp_path, monkeypatch, requires)
+        first.resolve_graph(["app", "lib<2"])
+        assert first.resolved["lib"].version == "1.0"
+
+        second = _offline_resolver(tmp_path, monkeypatch, requires)
+        second.resolve_graph(["app", "lib>=2"])
+        assert second.resolved["lib"].version == "2.0"
+        assert second.edges["app"] == ["lib"]
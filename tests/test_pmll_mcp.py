@@ -24,12 +24,18 @@ sys.path.insert(0, os.path.join(REPO_ROOT, "Ppm-lib"))
 
 from pmll_mcp.pmll_core import (
     MemoryController,
+    NUM_STRIPES,
     PythonBackend,
     Promise,
     JSONLStore,
     MemoryBlock,
     deterministic_hash,
+    content_id,
+    content_ids,
     make_backend,
+    prefetch_store,
+    _stable_json_bytes,
+    _stable_json_line,
     _stable_json_dumps,
 )
 from pmll_mcp.pmll_mcp_server import (
@@ -44,6 +50,7 @@ from pmll_mcp.pmll_mcp_server import (
     q_promise_trace,
     q_promise_write,
     _get_mc,
+    _hash_payload_reply,
 )
 
 # Reset the global MemoryController between tests
@@ -54,12 +61,10 @@ import pmll_mcp.pmll_mcp_server as _server_mod
 def reset_mc():
     """Reset the global MemoryController and cached Q lib before each test."""
     _server_mod._mc = None
-    _server_mod._q_lib = None
-    _server_mod._q_cb_type = None
+    _server_mod._q_handle = None
     yield
     _server_mod._mc = None
-    _server_mod._q_lib = None
-    _server_mod._q_cb_type = None
+    _server_mod._q_handle = None
 
 
 # ---------------------------------------------------------------------------
@@ -72,6 +77,11 @@ class TestPythonBackend:
         assert b.phi(0, 5) == 0
         assert b.phi(5, 5) == 0
 
+    def test_phi_many_matches_phi(self):
+        b = PythonBackend()
+        ids = [0, 3, 7, 10, 12345]
+        assert b.phi_many(ids, 7) == [b.phi(i, 7) for i in ids]
+
     def test_utilization_clamped(self):
         b = PythonBackend()
         b._util = 1.5
@@ -95,12 +105,63 @@ class TestDeterministicHash:
         h2 = deterministic_hash("test", salt="b")
         assert h1 != h2
 
+    def test_matches_plain_sha256(self):
+        import hashlib
+        expected = hashlib.sha256(b'salt{"a":1}').hexdigest()
+        assert deterministic_hash({"a": 1}, salt="salt") == expected
+        # Cached salt prefix must not be mutated between calls.
+        assert deterministic_hash({"a": 1}, salt="salt") == expected
+
+
+class TestContentId:
+    def test_stable_and_key_order_independent(self):
+        assert content_id({"a": 1, "b": 2}) == content_id({"b": 2, "a": 1})
+        assert len(content_id({"a": 1})) == 32
+
+    def test_salt_changes_id(self):
+        assert content_id("x", salt="a") != content_id("x", salt="b")
+
+    def test_batch_matches_single(self):
+        payloads = [{"pid": i, "slot": i % 4} for i in range(10)]
+        assert content_ids(payloads, salt="s") == [content_id(p, salt="s") for p in payloads]
+
 
 class TestStableJsonDumps:
     def test_sorted_keys(self):
         result = _stable_json_dumps({"z": 1, "a": 2})
         assert result == '{"a":2,"z":1}'
 
+    def test_scalars_match_encoder(self):
+        class Flag(int):
+            pass
+
+        for obj in (0, -7, 2 ** 70, True, False, None, Flag(3)):
+            assert _stable_json_dumps(obj) == json.dumps(obj, separators=(",", ":"))
+
+
+class TestCompiledStableDumps:
+    def test_matches_stdlib_encoder(self):
+        pmll_hash = pytest.importorskip("pmll_hash")
+        ref = json.JSONEncoder(sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode
+        for obj in [
+            {"z": [1, 2.5, None, True], "a": "q\"\n\x01é"},
+            [1e-7, 1e16, -0.0, 2 ** 70],
+            {1: "non-str key"},
+        ]:
+            assert pmll_hash.stable_dumps(obj) == ref(obj)
+
+
+class TestStableJsonBytes:
+    def test_sorted_keys_bytes(self):
+        assert _stable_json_bytes({"z": 1, "a": "é"}) == '{"a":"é","z":1}'.encode("utf-8")
+
+    def test_big_int_falls_back(self):
+        assert _stable_json_bytes({"n": 2 ** 70}) == b'{"n":1180591620717411303424}'
+
+    def test_line_is_bytes_plus_newline(self):
+        for obj in ({"z": 1, "a": "é"}, {"n": 2 ** 70}):
+            assert _stable_json_line(obj) == _stable_json_bytes(obj) + b"\n"
+
 
 class TestPromise:
     def test_not_expired(self):
@@ -112,6 +173,16 @@ class TestPromise:
         p.created_ts = time.time() - 1.0
         assert p.expired
 
+    def test_slotted(self):
+        p = Promise(pid=1, data="test")
+        assert not hasattr(p, "__dict__")
+        assert not hasattr(MemoryBlock(payload={}, mid="m", ts=0.0), "__dict__")
+
+    def test_expired_at(self):
+        p = Promise(pid=1, data="test", ttl_s=10.0, created_ts=100.0)
+        assert not p.expired_at(109.9)
+        assert p.expired_at(110.0)
+
     def test_no_ttl_never_expires(self):
         p = Promise(pid=1, data="test", ttl_s=None)
         assert not p.expired
@@ -133,6 +204,17 @@ class TestMemoryController:
         mc.process_promises()
         assert mc.utilization() == 0.1
 
+    def test_utilization_counts_overwrites_once(self):
+        mc = MemoryController(pool_size=4, store_dir=None)
+        mc.write(pid=1, data="a", ttl_s=60.0)
+        mc.write(pid=5, data="b", ttl_s=60.0)  # same slot as pid 1
+        mc.process_promises()
+        assert mc.utilization() == 0.25
+        mc.write(pid=1, data=None, ttl_s=60.0)
+        mc.process_promises()
+        assert mc.utilization() == 0.0
+        assert mc.pool_snapshot() == {}
+
     def test_pool_snapshot(self):
         mc = MemoryController(pool_size=16, store_dir=None)
         mc.write(pid=3, data="val", ttl_s=60.0)
@@ -152,10 +234,53 @@ class TestMemoryController:
         mc = MemoryController(pool_size=8, store_dir=None)
         mc.write(pid=1, data="stale", ttl_s=0.0)
         # Force the promise to be expired
-        mc._promise_queue[0].created_ts = time.time() - 1.0
+        _seq, promise = mc._stripes[1 % NUM_STRIPES].queue[0]
+        promise.created_ts = time.time() - 1.0
         committed = mc.process_promises()
         assert committed == 0
 
+    def test_last_write_wins_across_stripes(self):
+        mc = MemoryController(pool_size=4, store_dir=None)
+        # pids 1 and 5 share slot 1 but land on different queue stripes.
+        mc.write(pid=5, data="first", ttl_s=60.0)
+        mc.write(pid=1, data="second", ttl_s=60.0)
+        assert mc.process_promises() == 2
+        assert mc.read_slot(1) == "second"
+
+    def test_concurrent_writes(self):
+        import threading
+        mc = MemoryController(pool_size=256, store_dir=None)
+
+        def worker(base):
+            for i in range(64):
+                mc.write(pid=base + i, data=base + i, ttl_s=60.0)
+
+        threads = [threading.Thread(target=worker, args=(b,)) for b in (0, 64, 128, 192)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert mc.process_promises() == 256
+        assert mc.utilization() == 1.0
+        assert mc.pool_snapshot() == {i: i for i in range(256)}
+
+    def test_backend_without_phi_many(self):
+        class ScalarBackend(PythonBackend):
+            phi_many = None
+
+        mc = MemoryController(pool_size=8, backend=ScalarBackend(), store_dir=None)
+        mc.write(pid=9, data="x", ttl_s=60.0)
+        assert mc.process_promises() == 1
+        assert mc.read_slot(1) == "x"
+
+    def test_large_sparse_pool(self):
+        mc = MemoryController(pool_size=10_000_000, store_dir=None)
+        mc.write(pid=9_999_999, data="tail", ttl_s=60.0)
+        mc.process_promises()
+        assert mc.read_slot(9_999_999) == "tail"
+        assert mc.read_slot(0) is None
+        assert mc.pool_snapshot() == {9_999_999: "tail"}
+
     def test_read_invalid_slot(self):
         mc = MemoryController(pool_size=4, store_dir=None)
         assert mc.read_slot(-1) is None
@@ -171,6 +296,163 @@ class TestJSONLStore:
         assert len(loaded) == 1
         assert loaded[0].mid == "abc123"
 
+    def test_append_many(self, tmp_path):
+        store = JSONLStore(str(tmp_path / "pmll"))
+        store.append_many([
+            MemoryBlock(payload={"i": i}, mid=f"m{i}", ts=float(i)) for i in range(3)
+        ])
+        loaded = store.load()
+        assert [b.mid for b in loaded] == ["m0", "m1", "m2"]
+
+    def test_flush_makes_appends_visible(self, tmp_path):
+        store = JSONLStore(str(tmp_path / "pmll"), fsync_on_commit=True)
+        store.append(MemoryBlock(payload={"k": 1}, mid="m", ts=1.0))
+        store.flush()
+        with open(store.log_path, "r", encoding="utf-8") as f:
+            assert json.loads(f.readline())["mid"] == "m"
+        store.close()
+        store.close()  # idempotent
+
+    def test_dropped_store_is_collected_and_flushed(self, tmp_path):
+        import gc
+        import weakref
+        store = JSONLStore(str(tmp_path / "pmll"))
+        store.append(MemoryBlock(payload={"k": 1}, mid="m", ts=1.0))
+        log_path, ref = store.log_path, weakref.ref(store)
+        del store
+        gc.collect()
+        assert ref() is None  # no exit hook pins the store
+        with open(log_path, "r", encoding="utf-8") as f:
+            assert json.loads(f.readline())["mid"] == "m"
+
+    def test_process_promises_logs_blocks(self, tmp_path):
+        mc = MemoryController(pool_size=8, store_dir=str(tmp_path / "pmll"))
+        for pid in range(3):
+            mc.write(pid=pid, data=pid, ttl_s=60.0)
+        assert mc.process_promises() == 3
+        loaded = mc.store.load()
+        assert [b.payload["pid"] for b in loaded] == [0, 1, 2]
+        assert loaded[0].mid == content_id({"pid": 0, "slot": 0})
+
+    def test_load_empty_files(self, tmp_path):
+        store = JSONLStore(str(tmp_path / "pmll"))
+        open(store.log_path, "w").close()
+        assert store.load() == []
+        open(store.snapshot_path, "w").close()
+        assert store.load() == []
+
+    def test_load_without_orjson(self, tmp_path, monkeypatch):
+        import json as _json
+        import pmll_mcp.pmll_core as core
+        monkeypatch.setattr(core, "_orjson", None)
+        monkeypatch.setattr(core, "_json_loads", _json.loads)
+        store = JSONLStore(str(tmp_path / "pmll"))
+        store.append(MemoryBlock(payload={"k": "é"}, mid="m1", ts=1.0))
+        assert store.load()[0].payload == {"k": "é"}
+        store.save_snapshot([MemoryBlock(payload={"s": 1}, mid="s1", ts=2.0)])
+        assert [b.mid for b in store.load()] == ["s1"]
+
+    def test_prefetch_store(self, tmp_path):
+        store = JSONLStore(str(tmp_path / "pmll"))
+        store.append(MemoryBlock(payload={"a": 1}, mid="m1", ts=1.0))
+        store.flush()
+        prefetch_store(store.root)  # files present
+        prefetch_store(str(tmp_path / "missing"))  # no files: no error
+
+    def test_store_io_runs_outside_pool_locks(self, tmp_path):
+        mc = MemoryController(pool_size=16, store_dir=str(tmp_path / "pmll"))
+        held = []
+        real_append_many = mc.store.append_many
+
+        def spy(blocks):
+            held.extend(s.lock.locked() for s in mc._stripes)
+            real_append_many(blocks)
+
+        mc.store.append_many = spy
+        for pid in range(16):
+            mc.write(pid=pid, data=pid, ttl_s=60.0)
+        assert mc.process_promises() == 16
+        assert held and not any(held)
+
+    def test_controller_checkpoint_restore(self, tmp_path):
+        root = str(tmp_path / "pmll")
+        mc = MemoryController(pool_size=16, store_dir=root, checkpoint_every=2)
+        mc.write(pid=3, data={"v": 3}, ttl_s=60.0)
+        mc.write(pid=5, data="five", ttl_s=60.0)
+        mc.process_promises()  # reaches checkpoint_every
+        restored = MemoryController(pool_size=16, store_dir=root)
+        assert restored.pool_snapshot() == {3: {"v": 3}, 5: "five"}
+        assert restored.utilization() == 2 / 16
+
+    def test_checkpoint_keeps_big_ints(self, tmp_path):
+        root = str(tmp_path / "pmll")
+        mc = MemoryController(pool_size=16, store_dir=root)
+        mc.write(pid=4, data={"n": 2**70, "m": -(2**64)}, ttl_s=60.0)
+        mc.process_promises()
+        mc.checkpoint()
+        restored = MemoryController(pool_size=16, store_dir=root)
+        assert restored.read_slot(4) == {"n": 2**70, "m": -(2**64)}
+        assert type(restored.read_slot(4)["n"]) is int
+
+    def test_due_checkpoint_failure_does_not_fail_commit(self, tmp_path):
+        mc = MemoryController(pool_size=16, store_dir=str(tmp_path / "pmll"),
+                              checkpoint_every=1)
+        obj = object()  # committed fine, but not JSON-serializable
+        mc.write(pid=4, data=obj, ttl_s=60.0)
+        assert mc.process_promises() == 1
+        assert mc.read_slot(4) is obj
+        assert not any(n.endswith(".tmp") for n in os.listdir(mc.store.root))
+
+    def test_concurrent_checkpoints(self, tmp_path):
+        import threading
+        mc = MemoryController(pool_size=16, store_dir=str(tmp_path / "pmll"))
+        mc.write(pid=1, data="one", ttl_s=60.0)
+        mc.process_promises()
+        errors = []
+
+        def run():
+            try:
+                for _ in range(20):
+                    mc.checkpoint()
+            except Exception as exc:  # pragma: no cover - reported below
+                errors.append(exc)
+
+        threads = [threading.Thread(target=run) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert errors == []
+        assert mc.store.load_controller_snapshot()["live"] == {1: "one"}
+
+    def test_controller_checkpoint_pool_size_mismatch(self, tmp_path):
+        root = str(tmp_path / "pmll")
+        mc = MemoryController(pool_size=16, store_dir=root)
+        mc.write(pid=3, data="three", ttl_s=60.0)
+        mc.process_promises()
+        mc.checkpoint()
+        assert MemoryController(pool_size=8, store_dir=root).pool_snapshot() == {}
+
+    def test_controller_snapshot_unreadable(self, tmp_path):
+        import pickle
+        store = JSONLStore(str(tmp_path / "pmll"))
+        assert store.load_controller_snapshot() is None
+        for junk in (b"not json", b'{"pool_size": 4, "live": [["1", 2]]}',
+                     pickle.dumps({"pool_size": 4, "live": {}})):
+            with open(store.ctrl_snapshot_path, "wb") as f:
+                f.write(junk)
+            assert store.load_controller_snapshot() is None
+
+    def test_checkpointing_controller_is_collected(self, tmp_path):
+        import gc
+        import weakref
+        mc = MemoryController(pool_size=4, store_dir=str(tmp_path / "pmll"),
+                              checkpoint_every=8)
+        ref = weakref.ref(mc)
+        del mc
+        gc.collect()
+        assert ref() is None  # the exit-time checkpoint hook is weak
+
     def test_snapshot_preferred(self, tmp_path):
         store = JSONLStore(str(tmp_path / "pmll"))
         blocks = [
@@ -267,17 +549,53 @@ class TestMCPToolPhiSlot:
         assert result["slot"] == 10
 
 
+class TestServerConfig:
+    def test_env_int_falls_back_on_malformed_value(self, monkeypatch):
+        monkeypatch.setenv("PMLL_TEST_KNOB", "lots")
+        assert _server_mod._env_int("PMLL_TEST_KNOB", 1024) == 1024
+        monkeypatch.setenv("PMLL_TEST_KNOB", "8")
+        assert _server_mod._env_int("PMLL_TEST_KNOB", 1024) == 8
+        monkeypatch.delenv("PMLL_TEST_KNOB")
+        assert _server_mod._env_int("PMLL_TEST_KNOB", 1024) == 1024
+
+
 class TestMCPToolHashPayload:
     def test_hash_deterministic(self):
         r1 = json.loads(hash_payload(payload='{"a":1}'))
         r2 = json.loads(hash_payload(payload='{"a":1}'))
         assert r1["hash"] == r2["hash"]
 
+    def test_canonical_matches_parsed(self):
+        r1 = json.loads(hash_payload(payload='{"a":1,"b":[1,2]}', salt="s"))
+        r2 = json.loads(hash_payload(payload='{"a":1,"b":[1,2]}', salt="s", canonical=True))
+        assert r1["hash"] == r2["hash"]
+
+    def test_non_json_and_big_int_payloads(self):
+        plain = json.loads(hash_payload(payload="not json"))
+        assert plain["hash"] == deterministic_hash("not json")
+        big = json.loads(hash_payload(payload=str(2 ** 70)))
+        assert big["hash"] == deterministic_hash(2 ** 70)
+
     def test_hash_with_salt(self):
         r1 = json.loads(hash_payload(payload='"test"', salt="s1"))
         r2 = json.loads(hash_payload(payload='"test"', salt="s2"))
         assert r1["hash"] != r2["hash"]
 
+    def test_repeated_payload_is_cached(self):
+        _hash_payload_reply.cache_clear()
+        r1 = hash_payload(payload='{"cached":true}', salt="c")
+        r2 = hash_payload(payload='{"cached":true}', salt="c")
+        assert r1 == r2
+        assert _hash_payload_reply.cache_info().hits == 1
+        assert json.loads(r1)["hash"] == deterministic_hash({"cached": True}, salt="c")
+
+    def test_large_payload_is_not_cached(self):
+        _hash_payload_reply.cache_clear()
+        big = json.dumps({"blob": "x" * 100_000})
+        r = json.loads(hash_payload(payload=big))
+        assert r["hash"] == deterministic_hash({"blob": "x" * 100_000})
+        assert _hash_payload_reply.cache_info().currsize == 0
+
 
 # ---------------------------------------------------------------------------
 # MCP Tool: Q-promise integration
@@ -287,10 +605,13 @@ Q_SO_PATH = os.path.join(REPO_ROOT, "Q_promise_lib", "q_promises.so")
 
 @pytest.fixture(scope="session")
 def ensure_q_so():
-    """Ensure Q_promise shared library is built."""
+    """Ensure Q_promise shared library is built (make rebuilds only if stale)."""
     import subprocess
-    subprocess.check_call(["make", "-C", os.path.join(REPO_ROOT, "Q_promise_lib"), "clean"])
-    subprocess.check_call(["make", "-C", os.path.join(REPO_ROOT, "Q_promise_lib")])
+    q_dir = os.path.dirname(Q_SO_PATH)
+    sources = [os.path.join(q_dir, n) for n in ("Q_promises.c", "Q_promises.h", "Makefile")]
+    if not os.path.exists(Q_SO_PATH) or (
+            max(map(os.path.getmtime, sources)) > os.path.getmtime(Q_SO_PATH)):
+        subprocess.check_call(["make", "-C", q_dir, os.path.basename(Q_SO_PATH)])
     assert os.path.exists(Q_SO_PATH)
 
 
@@ -306,6 +627,12 @@ class TestMCPToolQPromiseTrace:
         assert result[0]["payload"] == "Known"
         assert result[1]["payload"] == "Unknown"
 
+    def test_lib_handle_cached(self, ensure_q_so):
+        lib1, cb1 = _server_mod._load_q_lib()
+        lib2, cb2 = _server_mod._load_q_lib()
+        assert lib1 is lib2
+        assert cb1 is cb2 is _server_mod._Q_CALLBACK_TYPE
+
     def test_trace_boundary(self, ensure_q_so):
         result = json.loads(q_promise_trace(chain_length=-1))
         assert "error" in result
@@ -21,6 +21,8 @@ from ppm_cli import (  # noqa: E402
     _sha256_file,
     _discover_wheels,
     _multipart_encode,
+    _multipart_segments,
+    _MultipartBody,
     cmd_publish,
     build_parser,
     main as ppm_main,
@@ -81,6 +83,30 @@ class TestReadTomlField:
         _make_toml(tmp_path)
         assert _read_toml_field(str(tmp_path / "PPM.toml"), "project", "missing") is None
 
+    def test_rereads_after_edit(self, tmp_path):
+        path = _make_toml(tmp_path, name="before")
+        assert _read_toml_field(path, "project", "name") == "before"
+        _make_toml(tmp_path, name="after-edit")
+        assert _read_toml_field(path, "project", "name") == "after-edit"
+
+    def test_fallback_scanner_without_tomllib(self, tmp_path, monkeypatch):
+        import ppm_cli
+
+        monkeypatch.setattr(ppm_cli, "tomllib", None)
+        path = tmp_path / "PPM.toml"
+        path.write_text(textwrap.dedent("""\
+            [project]
+            name = "outer"
+            [ tool.ppm ]  # registry settings
+            registry = "https://r.example.com"  # primary
+            mirror = 'https://m.example.com'
+            [[tool.ppm.extra]]
+            registry = "ignored"
+        """))
+        assert _read_toml_field(str(path), "tool.ppm", "registry") == "https://r.example.com"
+        assert _read_toml_field(str(path), "tool.ppm", "mirror") == "https://m.example.com"
+        assert _read_toml_field(str(path), "project", "name") == "outer"
+
 
 class TestSha256File:
     def test_hash_matches(self, tmp_path):
@@ -89,6 +115,16 @@ class TestSha256File:
         expected = hashlib.sha256(b"hello world").hexdigest()
         assert _sha256_file(str(f)) == expected
 
+    def test_fallback_spans_buffers(self, tmp_path, monkeypatch):
+        data = os.urandom((1 << 18) * 2 + 123)
+        f = tmp_path / "big.bin"
+        f.write_bytes(data)
+        monkeypatch.delattr(hashlib, "file_digest", raising=False)
+        assert _sha256_file(str(f)) == hashlib.sha256(data).hexdigest()
+        empty = tmp_path / "empty.bin"  # cannot be mapped; read loop
+        empty.write_bytes(b"")
+        assert _sha256_file(str(empty)) == hashlib.sha256(b"").hexdigest()
+
 
 class TestDiscoverWheels:
     def test_finds_wheels(self, tmp_path):
@@ -127,6 +163,32 @@ class TestMultipartEncode:
         assert "boundary=" in ct
 
 
+class TestMultipartBody:
+    def test_streams_same_bytes_as_encode(self, tmp_path):
+        whl = tmp_path / "big.whl"
+        whl.write_bytes(os.urandom(200_003))
+        fields = {"name": "pkg", "version": "1.0"}
+        body = _MultipartBody(
+            _multipart_segments(fields, {"wheel": ("big.whl", str(whl))}))
+        streamed = b"".join(iter(lambda: body.read(8192), b""))
+        expected, _ = _multipart_encode(
+            fields, {"wheel": ("big.whl", whl.read_bytes())})
+        assert streamed == expected
+        assert body.length == len(expected)
+
+    def test_digest_field_follows_streamed_file(self, tmp_path):
+        whl = tmp_path / "pkg.whl"
+        whl.write_bytes(os.urandom(70_001))
+        body = _MultipartBody(_multipart_segments(
+            {"name": "pkg"}, {"wheel": ("pkg.whl", str(whl))}, "sha256"))
+        assert body.hexdigest() is None  # nothing streamed yet
+        streamed = body.read()
+        digest = hashlib.sha256(whl.read_bytes()).hexdigest()
+        assert body.hexdigest() == digest
+        assert len(streamed) == body.length
+        assert streamed.index(whl.read_bytes()) < streamed.index(digest.encode())
+
+
 # ---------------------------------------------------------------------------
 # Integration test — publish with a local HTTP server
 # ---------------------------------------------------------------------------
@@ -156,17 +218,25 @@ class _UploadHandler(BaseHTTPRequestHandler):
         pass  # suppress request logs
 
 
+def _serve(cls, handler):
+    """Run *handler* on one local server for the whole test class."""
+    server = HTTPServer(("127.0.0.1", 0), handler)
+    cls.port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield
+    server.shutdown()
+    server.server_close()
+
+
 class TestPublishIntegration:
+    @pytest.fixture(scope="class", autouse=True)
+    @classmethod
+    def server(cls):
+        yield from _serve(cls, _UploadHandler)
+
     @pytest.fixture(autouse=True)
-    def setup_server(self):
-        _UploadHandler.uploads = []
-        self.server = HTTPServer(("127.0.0.1", 0), _UploadHandler)
-        self.port = self.server.server_address[1]
-        self.thread = threading.Thread(target=self.server.serve_forever)
-        self.thread.daemon = True
-        self.thread.start()
-        yield
-        self.server.shutdown()
+    def reset_uploads(self):
+        _UploadHandler.uploads.clear()
 
     def test_publish_uploads_wheel(self, tmp_path, capsys):
         _make_toml(tmp_path, name="test-pkg", version="0.1.0")
@@ -261,3 +331,91 @@ class TestPublishIntegration:
         assert len(_UploadHandler.uploads) == 3
         captured = capsys.readouterr()
         assert "3/3 wheel(s)" in captured.out
+
+
+class _KeepAliveHandler(_UploadHandler):
+    """HTTP/1.1 variant that records which client connection sent each POST."""
+    protocol_version = "HTTP/1.1"
+    peers = []
+
+    def do_POST(self):
+        _KeepAliveHandler.peers.append(self.client_address)
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        status = 403 if "reject" in self.path else 301 if "moved" in self.path else 200
+        payload = b'{"status":"ok"}'
+        self.send_response(status)
+        if status == 301:
+            self.send_header("Location", "/moved/")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class TestPublishKeepAlive:
+    @pytest.fixture(scope="class", autouse=True)
+    @classmethod
+    def server(cls):
+        yield from _serve(cls, _KeepAliveHandler)
+
+    @pytest.fixture(autouse=True)
+    def reset_peers(self):
+        _KeepAliveHandler.peers.clear()
+
+    def _wheelhouse(self, tmp_path, count):
+        wh_dir = tmp_path / "wheelhouse"
+        wh_dir.mkdir()
+        for i in range(count):
+            (wh_dir / f"ka-1.0-cp3{i}-linux.whl").write_bytes(b"w" * (i + 1))
+        return str(wh_dir)
+
+    def test_one_connection_per_worker(self, tmp_path, capsys):
+        _make_toml(tmp_path, name="ka", version="1.0")
+        wh_dir = self._wheelhouse(tmp_path, 3)
+        ppm_main([
+            "--root", str(tmp_path), "publish",
+            "--registry", f"http://127.0.0.1:{self.port}",
+            "--token", "tok", "--wheelhouse", wh_dir, "--jobs", "1",
+        ])
+        assert len(_KeepAliveHandler.peers) == 3
+        assert len(set(_KeepAliveHandler.peers)) == 1
+        assert "3/3 wheel(s)" in capsys.readouterr().out
+
+    def test_http_error_is_reported(self, tmp_path, capsys):
+        _make_toml(tmp_path, name="ka", version="1.0")
+        wh_dir = self._wheelhouse(tmp_path, 1)
+        with pytest.raises(SystemExit) as exc_info:
+            ppm_main([
+                "--root", str(tmp_path), "publish",
+                "--registry", f"http://127.0.0.1:{self.port}/reject",
+                "--token", "tok", "--wheelhouse", wh_dir,
+            ])
+        assert exc_info.value.code == 1
+        assert "HTTP 403" in capsys.readouterr().err
+
+    def test_redirect_is_not_counted_as_published(self, tmp_path, capsys):
+        _make_toml(tmp_path, name="ka", version="1.0")
+        wh_dir = self._wheelhouse(tmp_path, 1)
+        with pytest.raises(SystemExit) as exc_info:
+            ppm_main([
+                "--root", str(tmp_path), "publish",
+                "--registry", f"http://127.0.0.1:{self.port}/moved",
+                "--token", "tok", "--wheelhouse", wh_dir,
+            ])
+        assert exc_info.value.code == 1
+        captured = capsys.readouterr()
+        assert "HTTP 301" in captured.err
+        assert "✅" not in captured.out
+
+
+class TestHiddenFlags:
+    @pytest.mark.parametrize("argv, dest, value", [
+        (["doctor", "--fix"], "fix", True),
+        (["build", "--wheel"], "wheel", True),
+        (["install", "--prefer", "wheelhouse"], "prefer", "wheelhouse"),
+    ])
+    def test_accepted_but_not_in_help(self, argv, dest, value):
+        parser = build_parser()
+        assert getattr(parser.parse_args(argv), dest) == value
+        sub = parser._subparsers._group_actions[0].choices[argv[0]]
+        assert argv[1] not in sub.format_help()
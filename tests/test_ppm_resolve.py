@@ -0,0 +1,52 @@
+"""
+Tests for the ``ppm resolve`` command — the PPM.lock it writes from the
+[tool.ppm.dependencies] table of PPM.toml.
+"""
+import json
+import os
+import sys
+import textwrap
+
+import pytest
+
+# Ensure repo root is importable
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import ppm_cli  # noqa: E402
+from ppm_cli import main as ppm_main  # noqa: E402
+
+
+def _make_toml(tmp_path):
+    (tmp_path / "PPM.toml").write_text(textwrap.dedent("""\
+        [project]
+        name = "demo"
+        version = "0.1.0"
+
+        [tool.ppm.dependencies]
+        requests = "2.31.0"
+        "naïve" = { version = "1.0" }
+        """), encoding="utf-8")
+
+
+class TestResolveLock:
+    def test_lock_contents(self, tmp_path, capsys):
+        _make_toml(tmp_path)
+        ppm_main(["--root", str(tmp_path), "resolve"])
+        with open(tmp_path / "PPM.lock", "rb") as f:
+            lock = json.loads(f.read())
+        assert lock["packages"]["requests"] == {"version": "2.31.0", "resolved": True}
+        assert lock["packages"]["naïve"]["version"] == "1.0"
+        assert "Resolved 2 dependencies" in capsys.readouterr().out
+
+    def test_same_bytes_with_and_without_orjson(self, tmp_path, monkeypatch):
+        if ppm_cli.orjson is None:
+            pytest.skip("orjson not installed")
+        _make_toml(tmp_path)
+        ppm_main(["--root", str(tmp_path), "resolve"])
+        fast = (tmp_path / "PPM.lock").read_bytes()
+        monkeypatch.setattr(ppm_cli, "orjson", None)
+        ppm_main(["--root", str(tmp_path), "resolve"])
+        assert (tmp_path / "PPM.lock").read_bytes() == fast
+        assert fast.endswith(b"}\n")
+        assert "naïve".encode("utf-8") in fast